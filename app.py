@@ -3,6 +3,7 @@
 FSociety Discord Bot - Main Application
 """
 
+import asyncio
 import os
 import sys
 import threading
@@ -10,16 +11,28 @@ import time
 import signal
 import logging
 import requests
-from flask import Flask
-from main import bot
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from flask import Flask, Response
+from bot_logging import setup_logging
+import metrics
+from main import bot, status_snapshot, health_monitor, drain_for_shutdown, SHUTDOWN_TIMEOUT
+from web import start_web_server, keep_alive_loop
+from supervisor import supervise
+from cluster import CLUSTER_NODE
+
+# Configure logging (queue-based, see bot_logging.py)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+# Runtime: "threads" (bot thread + Flask + keep-alive thread) or "asyncio" (everything on the bot's loop)
+RUNTIME_MODE = os.getenv('RUNTIME_MODE', 'threads').strip().lower()
+
+# In a cluster (cluster.py) every process would ping the same public URL; only the first one does
+KEEP_ALIVE = CLUSTER_NODE in (None, '0')
+
+# Threads mode: the bot thread's loop and stop event, so the signal handler can shut it down cleanly
+bot_loop = None
+bot_stopping = None
+
 # Create Flask app for Render
 app = Flask(__name__)
 
@@ -28,8 +41,16 @@ def home():
     return "FSociety Discord Bot is running! 🤖", 200
 
 @app.route('/health')
+@app.route('/live')
 def health():
-    return "OK", 200
+    # Liveness from the monitor snapshot: 503 while the loop is wedged, the bot is down or the gateway is a zombie
+    ok, details = health_monitor.liveness()
+    return details, 200 if ok else 503
+
+@app.route('/ready')
+def ready():
+    ok, details = health_monitor.readiness()
+    return details, 200 if ok else 503
 
 @app.route('/ping')
 def ping():
@@ -37,20 +58,24 @@ def ping():
 
 @app.route('/status')
 def status():
-    return {
-        "status": "running",
-        "bot": "online",
-        "timestamp": time.time()
-    }, 200
+    return status_snapshot(), 200
+
+@app.route('/metrics')
+def prometheus_metrics():
+    # Reads copies of loop-owned structures; never waits on the bot loop
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/keep-alive')
 def keep_alive():
     return "alive", 200
 
+def get_service_url():
+    """Public URL of the service (localhost for development)"""
+    return os.getenv('RENDER_EXTERNAL_URL') or os.getenv('SERVICE_URL') or 'http://localhost:8080'
+
 def keep_alive_service():
     """Keep the service alive by pinging itself"""
-    # Get the service URL from environment or use localhost for development
-    service_url = os.getenv('RENDER_EXTERNAL_URL') or os.getenv('SERVICE_URL') or 'http://localhost:8080'
+    service_url = get_service_url()
     
     logger.info(f"🚀 بدء Keep-Alive Service لـ: {service_url}")
     
@@ -92,25 +117,62 @@ def run_bot():
     
     logger.info("🚀 بدء تشغيل البوت...")
     
-    while True:
-        try:
-            logger.info("🔄 محاولة تشغيل البوت...")
-            bot.run(token, log_handler=None)
-        except Exception as e:
-            logger.error(f"❌ خطأ في تشغيل البوت: {e}")
-            logger.info("🔄 إعادة تشغيل البوت خلال 30 ثانية...")
-            time.sleep(30)
-            continue
-        except KeyboardInterrupt:
-            logger.info("🛑 إيقاف البوت...")
-            break
+    async def supervised():
+        global bot_loop, bot_stopping
+        bot_loop, bot_stopping = asyncio.get_running_loop(), asyncio.Event()
+        health_monitor.start()
+        if await supervise(bot, token, bot_stopping, on_stop=drain_for_shutdown):
+            # Fatal error: keep the loop (and the health monitor) up so /ready reports it instead of restart loops
+            await bot_stopping.wait()
+    
+    try:
+        # One loop for the thread's lifetime; the supervisor rebuilds the client on it (see supervisor.py)
+        asyncio.run(supervised())
+    except KeyboardInterrupt:
+        logger.info("🛑 إيقاف البوت...")
+
+async def run_single_process():
+    """Run the bot, the HTTP server and keep-alive on one event loop (RUNTIME_MODE=asyncio)"""
+    port = int(os.environ.get('PORT', 8080))
+    runner = await start_web_server(port, status_snapshot, health_monitor)
+    keep_alive_task = asyncio.create_task(keep_alive_loop(get_service_url())) if KEEP_ALIVE else None
+    
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    
+    try:
+        token = os.getenv('DISCORD_TOKEN')
+        if not token:
+            logger.error("❌ يرجى إضافة DISCORD_TOKEN في متغيرات البيئة")
+            logger.error("في Render: اذهب إلى Environment Variables وأضف DISCORD_TOKEN")
+            await stopping.wait()
+            return
+        
+        logger.info("🚀 بدء تشغيل البوت...")
+        health_monitor.start()
+        if await supervise(bot, token, stopping, on_stop=drain_for_shutdown):
+            # Fatal error: keep serving /live and /ready (which report it) until told to stop
+            await stopping.wait()
+    finally:
+        if keep_alive_task:
+            keep_alive_task.cancel()
+        await runner.cleanup()
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
     logger.info("🛑 استلام إشارة الإيقاف...")
+    if bot_stopping is not None and bot_thread.is_alive():
+        # Let the bot drain in-flight work and close the gateway before the process exits
+        bot_loop.call_soon_threadsafe(bot_stopping.set)
+        bot_thread.join(SHUTDOWN_TIMEOUT + 5)
     sys.exit(0)
 
-if __name__ == "__main__":
+if __name__ == "__main__" and RUNTIME_MODE == 'asyncio':
+    # One event loop: no bot thread, no Flask server, no blocking keep-alive thread
+    asyncio.run(run_single_process())
+elif __name__ == "__main__":
     # Set up signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -120,8 +182,9 @@ if __name__ == "__main__":
     bot_thread.start()
     
     # Start keep-alive thread
-    keep_alive_thread = threading.Thread(target=keep_alive_service, daemon=True)
-    keep_alive_thread.start()
+    if KEEP_ALIVE:
+        keep_alive_thread = threading.Thread(target=keep_alive_service, daemon=True)
+        keep_alive_thread.start()
     
     # Wait a bit for bot to start
     time.sleep(5)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Structured Logging for FSociety Discord Bot
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# Output format: "text" (default) or "json" (one JSON object per line)
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').strip().lower()
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').strip().upper()
+
+# Per-category levels (override with LOG_LEVEL_<CATEGORY>, "OFF" disables a category)
+CATEGORY_LEVELS = {
+    'chat': 'OFF',
+    'commands': 'INFO',
+    'moderation': 'INFO',
+    'errors': 'INFO',
+}
+# Fraction of chat events that are logged when chat logging is on
+LOG_CHAT_SAMPLE_RATE = float(os.getenv('LOG_CHAT_SAMPLE_RATE', '1.0'))
+
+# LogRecord attributes that aren't user supplied fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as single-line JSON objects, including extra= fields"""
+
+    def format(self, record):
+        data = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Let through only a fraction of records"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return self.rate >= 1 or random.random() < self.rate
+
+def _parse_level(name):
+    """Convert a level name (or OFF) to a logging level"""
+    if name == 'OFF':
+        return logging.CRITICAL + 1
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else logging.INFO
+
+def setup_logging():
+    """Route all logging through a queue drained by a background thread (safe to call twice)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    if LOG_FORMAT == 'json':
+        formatter = JsonLinesFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+
+    # The event loop only pays for a queue put; the stdout write happens on the listener thread
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(_parse_level(LOG_LEVEL))
+
+    for category, default in CATEGORY_LEVELS.items():
+        level = os.getenv(f'LOG_LEVEL_{category.upper()}', default).strip().upper()
+        get_logger(category).setLevel(_parse_level(level))
+    get_logger('chat').addFilter(SamplingFilter(LOG_CHAT_SAMPLE_RATE))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def get_logger(category):
+    """Return the logger of a category (chat, commands, moderation, errors)"""
+    return logging.getLogger(f'fsociety.{category}')
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Cluster Mode for FSociety Discord Bot
+
+`python cluster.py` starts CLUSTER_PROCESSES copies of app.py (one per CPU core
+by default). Each one runs a slice of the shards and they all share the SQLite
+store; the unmute scheduler runs in whichever process holds the scheduler lease.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import requests
+from bot_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Set by the launcher in every child process (with CLUSTER_SIZE, SHARD_COUNT, SHARD_IDS and PORT)
+CLUSTER_NODE = os.getenv('CLUSTER_NODE')
+
+LEASE_TTL = 15  # seconds a leader stays leader without renewing
+RESTART_DELAY = 5  # seconds before a crashed process is started again
+
+class Lease:
+    """Leader election through a lease row in the shared store: one holder at a time, taken over once it expires"""
+
+    def __init__(self, store, name, on_acquire=None, on_lose=None, on_tick=None, ttl=LEASE_TTL):
+        self.store = store
+        self.name = name
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.on_acquire = on_acquire  # async callbacks, run on the loop competing for the lease
+        self.on_lose = on_lose
+        self.on_tick = on_tick  # every ttl / 3 seconds, leader or not
+        self.ttl = ttl
+        self.held = False
+        self._task = None
+
+    def start(self):
+        """Start competing for the lease if not already running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def release(self):
+        """Stop competing and hand the lease over (shutdown)"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self.held:
+            await self._set_held(False)
+            self.store.release_lease(self.name, self.holder)
+
+    async def _run(self):
+        while True:
+            try:
+                held = self.store.acquire_lease(self.name, self.holder, self.ttl, time.time())
+            except Exception as e:
+                # Can't tell whether the lease was renewed: step down rather than risk two leaders
+                logger.error(f"❌ خطأ في تجديد قيادة {self.name}: {e}")
+                held = False
+            if held != self.held:
+                await self._set_held(held)
+            if self.on_tick:
+                try:
+                    await self.on_tick()
+                except Exception as e:
+                    logger.error(f"❌ خطأ في مهمة {self.name} الدورية: {e}")
+            await asyncio.sleep(self.ttl / 3)
+
+    async def _set_held(self, held):
+        self.held = held
+        logger.info(f"{'👑 أصبحت' if held else '🔁 لم تعد'} هذه العملية قائد {self.name}")
+        callback = self.on_acquire if held else self.on_lose
+        if callback:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"❌ خطأ في تبديل قيادة {self.name}: {e}")
+
+def shard_slice(shard_count, node, size):
+    """Shards run by one process: every size-th shard starting at node"""
+    return [shard_id for shard_id in range(shard_count) if shard_id % size == node]
+
+def recommended_shard_count(token):
+    """Discord's recommended shard count for the bot, or None if it can't be fetched"""
+    try:
+        response = requests.get("https://discord.com/api/v10/gateway/bot",
+                                headers={'Authorization': f"Bot {token}"}, timeout=10)
+        response.raise_for_status()
+        return response.json()['shards']
+    except Exception as e:
+        logger.error(f"❌ تعذر جلب عدد الـ shards الموصى به: {e}")
+        return None
+
+def main():
+    """Start the cluster and keep every process running until SIGINT / SIGTERM"""
+    setup_logging()
+    size = int(os.getenv('CLUSTER_PROCESSES') or os.cpu_count() or 1)
+    shard_count = os.getenv('SHARD_COUNT', '').strip().lower()
+    if shard_count.isdigit():
+        shard_count = int(shard_count)
+    else:
+        shard_count = recommended_shard_count(os.getenv('DISCORD_TOKEN', '')) or size
+    size = max(1, min(size, shard_count))  # a process without shards would idle
+    port = int(os.environ.get('PORT', 8080))
+
+    def spawn(node):
+        env = dict(os.environ,
+                   CLUSTER_NODE=str(node),
+                   CLUSTER_SIZE=str(size),
+                   SHARD_COUNT=str(shard_count),
+                   SHARD_IDS=",".join(map(str, shard_slice(shard_count, node, size))),
+                   PORT=str(port + node))  # node 0 serves the platform's PORT
+        logger.info(f"🚀 تشغيل العملية {node} (shards: {env['SHARD_IDS']}, port {env['PORT']})")
+        app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+        return subprocess.Popen([sys.executable, '-u', app_path], env=env)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    logger.info(f"🧩 تشغيل {size} عمليات لـ {shard_count} shard")
+    processes = [spawn(node) for node in range(size)]
+    crashed_at = {}
+    while not stopping:
+        time.sleep(1)
+        for node, process in enumerate(processes):
+            if process.poll() is None:
+                continue
+            if node not in crashed_at:
+                logger.error(f"❌ توقفت العملية {node} (code {process.returncode})، إعادة التشغيل خلال {RESTART_DELAY} ثوان")
+                crashed_at[node] = time.monotonic()
+            elif time.monotonic() - crashed_at[node] >= RESTART_DELAY:
+                del crashed_at[node]
+                processes[node] = spawn(node)
+
+    # Every process drains and checkpoints on SIGTERM (see drain_for_shutdown in main.py)
+    logger.info("🛑 إيقاف جميع العمليات...")
+    for process in processes:
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+    deadline = time.monotonic() + float(os.getenv('SHUTDOWN_TIMEOUT', '15')) + 10
+    for process in processes:
+        try:
+            process.wait(max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+if __name__ == "__main__":
+    main()
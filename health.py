@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Liveness / Readiness Monitor for FSociety Discord Bot
+"""
+
+import asyncio
+import collections
+import math
+import time
+
+# Liveness: the process is doing useful work (a failing check means "restart me")
+SNAPSHOT_MAX_AGE = 30  # seconds without a fresh snapshot: loop wedged or bot not running
+HEARTBEAT_ACK_MAX_AGE = 120  # seconds since Discord acknowledged a heartbeat (zombie connection)
+LOOP_LAG_MAX = 5  # seconds the loop was late waking the monitor
+
+# Readiness: the bot can serve commands right now (a failing check means "route around me")
+READY_LOOP_LAG_MAX = 1
+READY_SCHEDULER_LAG_MAX = 60  # seconds the most overdue unmute has been waiting
+
+EVENT_RATE_WINDOW = 10  # seconds of samples behind the per-shard event rate
+
+class HealthMonitor:
+    """Sample gateway and loop health once a second into a snapshot that HTTP handlers read without locks"""
+
+    def __init__(self, bot, scheduler, interval=1.0):
+        self.bot = bot
+        self.scheduler = scheduler
+        self.interval = interval
+        self.connected = False  # every shard connected, see set_connected()
+        self.draining = False  # set once shutdown starts: not ready, still live
+        # Replaced as a whole (never mutated), so readers on any thread see a consistent snapshot
+        self.snapshot = {'updated_at': 0}
+        self._task = None
+        self._shards_connected = {}  # shard id -> connected (None for a single connection)
+        self._sequences = {}  # shard id -> recent (monotonic time, gateway sequence) samples
+
+    def set_connected(self, connected, shard_id=None):
+        """Record a connect / resume / disconnect event of a shard (shard_id None without sharding)"""
+        self._shards_connected[shard_id] = connected
+        expected = self._expected_shards()
+        # Shards that haven't connected yet count as down, so a half-started bot isn't reported healthy
+        self.connected = bool(expected) and all(self._shards_connected.get(shard_id, False) for shard_id in expected)
+
+    def _expected_shards(self):
+        """Shard ids this process should run ([None] without sharding, empty while the shard count is unknown)"""
+        if getattr(self.bot, 'shards', None) is None:
+            return [None]
+        if self.bot.shard_ids is not None:
+            return list(self.bot.shard_ids)
+        return list(range(self.bot.shard_count or 0))
+
+    def start(self):
+        """Start sampling on the running loop if not already running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.snapshot = self._collect(max(0.0, loop.time() - expected))
+
+    def _websockets(self):
+        """(shard id, websocket) for every shard this process runs"""
+        shard_ids = getattr(self.bot, 'shards', None)
+        if shard_ids is None:
+            return [(self.bot.shard_id, self.bot.ws)]
+        return [(shard_id, self.bot._get_websocket(shard_id=shard_id)) for shard_id in shard_ids]
+
+    def _event_rate(self, shard_id, sequence):
+        """Gateway events per second of a shard, from how fast its sequence number grows"""
+        samples = self._sequences.setdefault(shard_id, collections.deque(maxlen=EVENT_RATE_WINDOW + 1))
+        if samples and sequence < samples[-1][1]:
+            samples.clear()  # new session: the sequence starts over
+        samples.append((time.monotonic(), sequence))
+        elapsed = samples[-1][0] - samples[0][0]
+        return (samples[-1][1] - samples[0][1]) / elapsed if elapsed > 0 else 0.0
+
+    def _collect(self, loop_lag):
+        shards = {}
+        for shard_id, ws in self._websockets():
+            keep_alive = getattr(ws, '_keep_alive', None)
+            last_ack = getattr(keep_alive, '_last_ack', None)
+            latency = getattr(ws, 'latency', None)
+            shards[shard_id if shard_id is not None else 0] = {
+                'connected': ws is not None and self._shards_connected.get(shard_id, False),
+                'latency': latency if latency is not None and math.isfinite(latency) else None,
+                'heartbeat_ack_age': time.perf_counter() - last_ack if last_ack is not None else None,
+                'events_per_second': self._event_rate(shard_id, getattr(ws, 'sequence', None) or 0),
+            }
+        ack_ages = [shard['heartbeat_ack_age'] for shard in shards.values()
+                    if shard['connected'] and shard['heartbeat_ack_age'] is not None]
+        overdue, scheduler_lag = self.scheduler.backlog(time.time())
+        return {
+            'connected': self.connected and bool(shards) and not self.bot.is_closed(),
+            'ready': self.bot.is_ready(),
+            'heartbeat_ack_age': max(ack_ages, default=None),  # the stalest connected shard
+            'loop_lag': loop_lag,
+            'scheduler_overdue': overdue,
+            'scheduler_lag': scheduler_lag,
+            'shards': shards,
+            'updated_at': time.time(),
+        }
+
+    def liveness(self):
+        """Return (ok, details) for the liveness probe"""
+        snapshot = self.snapshot
+        age = time.time() - snapshot['updated_at']
+        problems = []
+        if age > SNAPSHOT_MAX_AGE:
+            problems.append('monitor_stale')
+        else:
+            ack_age = snapshot['heartbeat_ack_age']
+            if ack_age is not None and ack_age > HEARTBEAT_ACK_MAX_AGE:
+                problems.append('heartbeat_ack_stale')
+            if snapshot['loop_lag'] > LOOP_LAG_MAX:
+                problems.append('loop_lag')
+        return not problems, dict(snapshot, snapshot_age=age, problems=problems)
+
+    def readiness(self):
+        """Return (ok, details) for the readiness probe"""
+        live, details = self.liveness()
+        problems = list(details['problems'])
+        if self.draining:
+            problems.append('shutting_down')
+        if live:
+            if not details['connected']:
+                problems.append('gateway_disconnected')
+            elif not details['ready']:
+                problems.append('not_ready')
+            if details['loop_lag'] > READY_LOOP_LAG_MAX:
+                problems.append('loop_lag')
+            if details['scheduler_lag'] > READY_SCHEDULER_LAG_MAX:
+                problems.append('scheduler_backlog')
+        return not problems, dict(details, problems=problems)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Background Job Engine for FSociety Discord Bot
+"""
+
+import asyncio
+import time
+from bot_logging import get_logger
+
+error_logger = get_logger('errors')
+
+# Minimum seconds between progress checkpoints written to the store
+CHECKPOINT_INTERVAL = 5
+
+FINISHED_STATES = ('done', 'failed', 'cancelled')
+
+class Job:
+    """A long-running operation with a persisted progress checkpoint"""
+
+    def __init__(self, manager, id, guild_id, kind, params, state='queued', progress=None,
+                 error=None, created_by=None, created_at=None, updated_at=None):
+        self.manager = manager
+        self.id = id
+        self.guild_id = guild_id
+        self.kind = kind
+        self.params = params
+        self.state = state
+        self.progress = progress or {}  # runner-defined checkpoint, handed back on resume
+        self.error = error
+        self.created_by = created_by
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self._last_checkpoint = 0
+
+    @property
+    def finished(self):
+        return self.state in FINISHED_STATES
+
+    def checkpoint(self, force=False, **progress):
+        """Update the progress and save it (at most every CHECKPOINT_INTERVAL seconds unless forced)"""
+        self.progress.update(progress)
+        now = time.time()
+        if force or now - self._last_checkpoint >= CHECKPOINT_INTERVAL:
+            self._last_checkpoint = now
+            self.updated_at = now
+            self.manager.store.update_job(self.id, now, progress=self.progress)
+
+class JobManager:
+    """Run registered job kinds in the background, a few per guild at a time, resuming them after a restart"""
+
+    def __init__(self, store, per_guild_limit=2, owns=None):
+        self.store = store
+        self.per_guild_limit = per_guild_limit
+        self.owns = owns  # optional guild id filter: other processes' jobs are not resumed here
+        self.runners = {}  # kind -> async runner(job)
+        self._jobs = {}  # id -> unfinished job
+        self._tasks = {}  # id -> running task
+        self._resumed = False
+        self.stopping = False  # set by suspend(): nothing new starts, running jobs stay resumable
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def register(self, kind, runner):
+        """Register the coroutine function that runs (or resumes) jobs of a kind"""
+        self.runners[kind] = runner
+
+    def submit(self, guild_id, kind, params, created_by=None):
+        """Create a job and start it as soon as the guild has a free slot"""
+        now = time.time()
+        job_id = self.store.create_job(guild_id, kind, params, created_by, now)
+        job = Job(self, job_id, guild_id, kind, params, created_by=created_by, created_at=now, updated_at=now)
+        self._jobs[job_id] = job
+        self._start_queued(guild_id)
+        return job
+
+    def get(self, job_id):
+        """Return a job (unfinished ones from memory, finished ones from the store), or None"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            row = self.store.get_job(job_id)
+            if row:
+                job = Job(self, **row)
+        return job
+
+    def active(self, guild_id, kind=None):
+        """Unfinished jobs of a guild (optionally of one kind)"""
+        return [job for job in self._jobs.values()
+                if job.guild_id == guild_id and (kind is None or job.kind == kind)]
+
+    def recent(self, guild_id, limit=10):
+        """A guild's most recent jobs, unfinished ones with live progress"""
+        return [self._jobs.get(row['id']) or Job(self, **row) for row in self.store.list_jobs(guild_id, limit)]
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns True if it was unfinished"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        task = self._tasks.get(job_id)
+        if task:
+            task.cancel()  # _run records the cancelled state
+        else:
+            self._finish(job, 'cancelled')
+        return True
+
+    def resume(self):
+        """Restart jobs left queued or running by the previous process (safe to call more than once)"""
+        if self._resumed:
+            return
+        self._resumed = True
+        for row in self.store.load_unfinished_jobs():
+            if row['id'] in self._jobs or (self.owns is not None and not self.owns(row['guild_id'])):
+                continue
+            job = Job(self, **dict(row, state='queued'))
+            if job.kind not in self.runners:
+                self.store.update_job(job.id, time.time(), state='failed', error='unknown job kind')
+                continue
+            self._jobs[job.id] = job
+        for guild_id in {job.guild_id for job in self._jobs.values()}:
+            self._start_queued(guild_id)
+
+    async def suspend(self):
+        """Stop running jobs for shutdown, saving them as queued (with their progress) for the next resume()"""
+        self.stopping = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _start_queued(self, guild_id):
+        if self.stopping:
+            return  # submitted during shutdown: stays queued in the store
+        running = sum(1 for job in self.active(guild_id) if job.state == 'running')
+        for job in sorted(self.active(guild_id), key=lambda job: job.id):
+            if running >= self.per_guild_limit:
+                break
+            if job.state != 'queued':
+                continue
+            job.state = 'running'
+            self.store.update_job(job.id, time.time(), state='running')
+            self._tasks[job.id] = asyncio.create_task(self._run(job))
+            running += 1
+
+    async def _run(self, job):
+        try:
+            await self.runners[job.kind](job)
+        except asyncio.CancelledError:
+            if self.stopping:
+                job.state = 'queued'
+                self.store.update_job(job.id, time.time(), state='queued', progress=job.progress)
+                self._tasks.pop(job.id, None)
+            else:
+                self._finish(job, 'cancelled')
+        except Exception as e:
+            error_logger.error("Job %s (%s) failed: %s", job.id, job.kind, e)
+            self._finish(job, 'failed', str(e))
+        else:
+            self._finish(job, 'done')
+
+    def _finish(self, job, state, error=None):
+        job.state = state
+        job.error = error
+        job.updated_at = time.time()
+        self.store.update_job(job.id, job.updated_at, state=state, progress=job.progress, error=error)
+        self._jobs.pop(job.id, None)
+        self._tasks.pop(job.id, None)
+        self._start_queued(job.guild_id)
@@ -1,94 +1,403 @@
 import discord
 from discord.ext import commands
 import asyncio
+import contextvars
 import datetime
+import logging
+import math
 import os
+import re
+import time
 from dotenv import load_dotenv
 import weakref
+from storage import BotStore
+from scheduler import MuteScheduler
+from reports import ReportQueue
+from outbound import OutboundScheduler, ENFORCEMENT, REPLY, REPORT, CLEANUP, BACKGROUND
+from purge import StreamingPurge
+from jobs import JobManager
+import metrics
+from metrics import RateLimitCounter
+from health import HealthMonitor
+from cluster import Lease, CLUSTER_NODE
+from bot_logging import setup_logging, get_logger
 
 # Load environment variables
 load_dotenv()
 
+# Logging: queue-based, drained off the event loop (see bot_logging.py)
+setup_logging()
+chat_logger = get_logger('chat')
+command_logger = get_logger('commands')
+moderation_logger = get_logger('moderation')
+error_logger = get_logger('errors')
+
 # Bot setup
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='', intents=intents)
-
-# Global task tracking
-active_unmute_tasks = {}
-
-def log_command_usage(ctx, command_name):
-    """Log command usage for debugging"""
-    print(f"Command '{command_name}' used by {ctx.author} in {ctx.guild}")
-
-def validate_member_permissions(ctx, member):
-    """Check if member can be targeted by moderation commands"""
-    if member.bot:
-        return False, "لا يمكن التصرف مع البوتات"
-    if member == ctx.author:
-        return False, "لا يمكنك التصرف مع نفسك"
-    if member.guild_permissions.administrator:
-        return False, "لا يمكن التصرف مع المشرفين"
-    return True, None
-
-def has_admin_permissions(ctx):
-    """Check if user is owner or has admin permissions"""
+intents.members = True  # member cache + on_member_update (enable "Server Members Intent" in the developer portal)
+
+# Sharding (opt-in): SHARD_COUNT ("auto" or a number) runs AutoShardedBot, SHARD_IDS picks this process's shards
+SHARD_COUNT = os.getenv('SHARD_COUNT', '').strip().lower()
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv('SHARD_IDS', '').replace(' ', '').split(',') if shard_id]
+if SHARD_COUNT or SHARD_IDS:
+    bot = commands.AutoShardedBot(command_prefix='', intents=intents,
+                                  shard_count=int(SHARD_COUNT) if SHARD_COUNT.isdigit() else None,
+                                  shard_ids=SHARD_IDS or None)
+else:
+    bot = commands.Bot(command_prefix='', intents=intents)
+SHARDED = isinstance(bot, commands.AutoShardedBot)
+
+# Cluster mode (python cluster.py): processes share the store, the scheduler lease decides who lifts mutes
+CLUSTERED = CLUSTER_NODE is not None
+
+def owns_guild(guild_id):
+    """Whether this process runs the shard that receives a guild's events"""
+    if not SHARDED or not SHARD_IDS:
+        return True
+    return (guild_id >> 22) % bot.shard_count in SHARD_IDS
+
+# Persistent state: pending unmutes survive restarts (see storage.py / scheduler.py)
+store = BotStore()
+
+async def process_expired_mutes(entries):
+    """Scheduler callback: lift a batch of expired mutes concurrently; returns the ones that failed"""
+    results = await asyncio.gather(*(auto_unmute(entry) for entry in entries))
+    return [entry for entry, handled in zip(entries, results) if not handled]
+
+# In a cluster the lease holder lifts every guild's mutes (over REST for guilds it doesn't run)
+mute_scheduler = MuteScheduler(store, process_expired_mutes, owns=None if CLUSTERED else owns_guild)
+
+async def lead_mute_scheduler():
+    """Scheduler lease acquired: take over every pending unmute in the store"""
+    mute_scheduler.sync()
+    mute_scheduler.start()
+
+async def sync_mute_scheduler():
+    # Leader: pick up mutes scheduled by other processes; others: drop the ones the leader handled
+    mute_scheduler.sync()
+
+expiry_lease = Lease(store, 'mute_scheduler', on_acquire=lead_mute_scheduler,
+                     on_lose=mute_scheduler.stop, on_tick=sync_mute_scheduler)
+
+# Liveness / readiness snapshot for the HTTP probes (see health.py)
+health_monitor = HealthMonitor(bot, mute_scheduler)
+
+# Metrics: updated on the bot loop without locks, rendered on /metrics by app.py (see metrics.py)
+command_timings = contextvars.ContextVar('command_timings', default=None)  # phase -> seconds of the running command
+command_latency = metrics.registry.histogram(
+    'fsociety_command_phase_seconds', 'Time spent in each phase of a command (parse, authorization, rest, reply, total)',
+    labels=('command', 'phase'))
+rate_limit_hits = metrics.registry.counter(
+    'fsociety_rest_rate_limited_total', 'REST 429 responses by route bucket', labels=('bucket',))
+logging.getLogger('discord.http').addFilter(RateLimitCounter(rate_limit_hits))
+gateway_outages = metrics.registry.histogram(
+    'fsociety_gateway_outage_seconds', 'Time from a gateway disconnect until the next connection',
+    buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800))
+gateway_down_since = {}  # shard id (None without sharding) -> monotonic time its current outage started
+
+def add_command_time(phase, seconds):
+    """Add time to a phase of the command running in this context (no-op outside commands)"""
+    timings = command_timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0) + seconds
+
+# Outbound REST calls: enforcement > replies > reports > cleanup, round-robin across guilds (see outbound.py)
+OUTBOUND_CONCURRENCY = int(os.getenv('OUTBOUND_CONCURRENCY', '8'))
+outbound = OutboundScheduler(OUTBOUND_CONCURRENCY)
+
+async def enforce(guild, func, /, *args, **kwargs):
+    """Run a moderation REST call (mute, ban, kick, purge, roles) in the enforcement class"""
+    started = time.perf_counter()
+    try:
+        return await outbound.call(guild.id, ENFORCEMENT, func, *args, **kwargs)
+    finally:
+        add_command_time('rest', time.perf_counter() - started)
+
+async def reply(channel, content=None, *, delete_after=None, **kwargs):
+    """Send a reply in the reply class; delete_after is queued as a cleanup request"""
+    started = time.perf_counter()
+    try:
+        sent = await outbound.call(channel.guild.id, REPLY, channel.send, content, **kwargs)
+    finally:
+        add_command_time('reply', time.perf_counter() - started)
+    if delete_after is not None:
+        outbound.submit(channel.guild.id, CLEANUP, sent.delete, delay=delete_after)
+    return sent
+
+# Background jobs: long operations run as resumable jobs with ids (see jobs.py)
+JOBS_PER_GUILD = int(os.getenv('JOBS_PER_GUILD', '2'))
+job_manager = JobManager(store, JOBS_PER_GUILD, owns=owns_guild)
+
+# Graceful shutdown (see drain_for_shutdown)
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', '15'))  # seconds to drain before the gateway closes
+accepting_commands = True
+commands_in_flight = set()  # on_message tasks running a command
+
+# Role / channel lookup by name: guild id -> {name: object}, rebuilt lazily after role/channel events
+role_name_cache = {}
+channel_name_cache = {}
+
+ADMIN_ROLE_NAMES = ["admin", "Admin", "ADMIN", "مشرف", "مدير", "أدمن"]
+
+def get_role(guild, name):
+    """Return the first role with this name (same result as discord.utils.get) from the cache"""
+    roles = role_name_cache.get(guild.id)
+    if roles is None:
+        roles = {}
+        for role in guild.roles:
+            roles.setdefault(role.name, role)
+        role_name_cache[guild.id] = roles
+    return roles.get(name)
+
+def get_channel(guild, name):
+    """Return the first channel with this name (same result as discord.utils.get) from the cache"""
+    channels = channel_name_cache.get(guild.id)
+    if channels is None:
+        channels = {}
+        for channel in guild.channels:
+            channels.setdefault(channel.name, channel)
+        channel_name_cache[guild.id] = channels
+    return channels.get(name)
+
+# Authorization cache: guild id -> {member id: bool}, dropped on role changes and role permission edits
+admin_permission_cache = {}
+permission_cache_lookups = metrics.registry.counter(
+    'fsociety_permission_cache_lookups_total', 'Authorization cache lookups', labels=('result',))
+
+def compute_admin_permissions(guild, member):
+    """Check if member is owner or has admin permissions (uncached)"""
     # Check if user is server owner
-    if ctx.author == ctx.guild.owner:
+    if member.id == guild.owner_id:
         return True
     
     # Check if user has owner role
-    owner_role = discord.utils.get(ctx.guild.roles, name="owner")
-    if owner_role and owner_role in ctx.author.roles:
+    owner_role = get_role(guild, "owner")
+    if owner_role and member.get_role(owner_role.id):
         return True
     
     # Check if user has admin role (any role with admin permissions)
-    admin_roles = ["admin", "Admin", "ADMIN", "مشرف", "مدير", "أدمن"]
-    for role_name in admin_roles:
-        admin_role = discord.utils.get(ctx.guild.roles, name=role_name)
-        if admin_role and admin_role in ctx.author.roles:
+    for role_name in ADMIN_ROLE_NAMES:
+        admin_role = get_role(guild, role_name)
+        if admin_role and member.get_role(admin_role.id):
             return True
     
     # Check if user has any role with admin permissions
-    for role in ctx.author.roles:
+    for role in member.roles:
         if role.permissions.administrator or role.permissions.manage_guild:
             return True
     
     return False
 
-def is_owner(ctx):
-    """Check if user is server owner"""
-    return ctx.author == ctx.guild.owner
+def check_admin_permissions(guild, member):
+    """Check if member is owner or has admin permissions, using the authorization cache"""
+    guild_cache = admin_permission_cache.setdefault(guild.id, {})
+    allowed = guild_cache.get(member.id)
+    if allowed is not None:
+        permission_cache_lookups.inc(result='hits')
+        return allowed
+    
+    permission_cache_lookups.inc(result='misses')
+    allowed = compute_admin_permissions(guild, member)
+    guild_cache[member.id] = allowed
+    return allowed
+
+def invalidate_member_permissions(guild, member_id):
+    """Forget the cached authorization of one member"""
+    guild_cache = admin_permission_cache.get(guild.id)
+    if guild_cache:
+        guild_cache.pop(member_id, None)
 
-async def create_muted_role(ctx):
-    """Create muted role if it doesn't exist"""
+# Muted role channel overwrites
+MUTED_TEXT_OVERWRITE = {'send_messages': False, 'add_reactions': False}
+MUTED_VOICE_OVERWRITE = {'speak': False, 'connect': False}
+# Requests go through the outbound scheduler's background class (behind every mute);
+# this bound keeps the fan-out from queueing a whole guild's channels at once
+OVERWRITE_CONCURRENCY = 5
+
+muted_overwrites_incomplete = set()  # guild ids whose last fan-out had failures
+
+def muted_overwrite_for(channel):
+    """Return the Muted role overwrite for a channel type, or None"""
+    if isinstance(channel, discord.TextChannel):
+        return MUTED_TEXT_OVERWRITE
+    if isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
+        return MUTED_VOICE_OVERWRITE
+    return None
+
+def needs_muted_overwrite(channel, muted_role):
+    """Check if a channel is missing the Muted role overwrite"""
+    expected = muted_overwrite_for(channel)
+    if expected is None:
+        return False
+    current = channel.overwrites_for(muted_role)
+    return any(getattr(current, key) != value for key, value in expected.items())
+
+async def apply_muted_overwrites(guild, muted_role, progress=None):
+    """Apply the Muted overwrite to every channel missing it, a few channels at a time"""
+    channels = [channel for channel in guild.channels if needs_muted_overwrite(channel, muted_role)]
+    total = len(channels)
+    done = 0
+    failed = []
+    semaphore = asyncio.Semaphore(OVERWRITE_CONCURRENCY)
+    
+    async def apply(channel):
+        nonlocal done
+        async with semaphore:
+            try:
+                await outbound.call(guild.id, BACKGROUND, channel.set_permissions, muted_role,
+                                    reason="إعداد رتبة Muted", **muted_overwrite_for(channel))
+            except discord.Forbidden:
+                pass  # Skip channels where bot doesn't have permission
+            except Exception as e:
+                error_logger.warning("Error setting permissions for %s: %s", channel.name, e)
+                failed.append(channel)
+            done += 1
+            if progress:
+                await progress(done, total)
+    
+    await asyncio.gather(*(apply(channel) for channel in channels))
+    return total, failed
+
+async def setup_muted_channels(guild, muted_role, report_channel=None, job=None):
+    """Fan the Muted overwrite out to the guild's channels, reporting progress to report_channel"""
+    progress_message = None
+    last_edit = 0
+    
+    async def progress(done, total):
+        nonlocal progress_message, last_edit
+        if job:
+            job.checkpoint(done=done, total=total)
+        if not report_channel:
+            return
+        text = f"⏳ جاري إعداد رتبة Muted في القنوات: {done}/{total}"
+        try:
+            if progress_message is None:
+                progress_message = await outbound.call(guild.id, BACKGROUND, report_channel.send, text)
+                last_edit = time.monotonic()
+            elif done == total or time.monotonic() - last_edit >= 2:
+                last_edit = time.monotonic()
+                await outbound.call(guild.id, BACKGROUND, progress_message.edit, content=text)
+        except discord.HTTPException:
+            pass
+    
     try:
-        muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
-        if not muted_role:
-            # Check if bot has permission to create roles
-            if not ctx.guild.me.guild_permissions.manage_roles:
-                raise discord.Forbidden("البوت لا يملك صلاحية إدارة الرتب")
-            
-            muted_role = await ctx.guild.create_role(name="Muted", color=discord.Color.dark_gray())
-            
-            # Set permissions for all channels
-            for channel in ctx.guild.channels:
-                try:
-                    if isinstance(channel, discord.TextChannel):
-                        await channel.set_permissions(muted_role, send_messages=False, add_reactions=False)
-                    elif isinstance(channel, discord.VoiceChannel):
-                        await channel.set_permissions(muted_role, speak=False, connect=False)
-                except discord.Forbidden:
-                    continue  # Skip channels where bot doesn't have permission
-                except Exception as e:
-                    print(f"Error setting permissions for {channel.name}: {e}")
-                    continue
-        
-        return muted_role
-    except discord.Forbidden as e:
-        raise discord.Forbidden("البوت لا يملك صلاحيات كافية لإدارة الرتب")
+        total, failed = await apply_muted_overwrites(guild, muted_role, progress)
+        if failed:
+            # The next mute (or restart) resumes with the channels that are still missing
+            muted_overwrites_incomplete.add(guild.id)
+        else:
+            muted_overwrites_incomplete.discard(guild.id)
+        
+        if progress_message:
+            text = f"✅ تم إعداد رتبة Muted في {total - len(failed)} قناة"
+            if failed:
+                text += f" (تعذر إعداد {len(failed)} قناة - ستتم إعادة المحاولة)"
+            await outbound.call(guild.id, BACKGROUND, progress_message.edit, content=text)
+            outbound.submit(guild.id, CLEANUP, progress_message.delete, delay=10)
     except Exception as e:
-        raise Exception(f"خطأ في إنشاء دور الميوت: {str(e)}")
+        muted_overwrites_incomplete.add(guild.id)
+        error_logger.error("Error setting up Muted role channels: %s", e)
+
+def start_muted_setup(guild, muted_role, report_channel=None):
+    """Start the channel fan-out job for a guild unless one is queued or running"""
+    jobs = job_manager.active(guild.id, 'muted_setup')
+    if jobs:
+        return jobs[0]
+    return job_manager.submit(guild.id, 'muted_setup', {
+        'role_id': muted_role.id,
+        'report_channel_id': report_channel.id if report_channel else None,
+    })
+
+async def run_muted_setup_job(job):
+    """Job runner: apply the Muted overwrite (only channels still missing it, so resuming is a rerun)"""
+    guild = bot.get_guild(job.guild_id)
+    if not guild:
+        raise RuntimeError("السيرفر غير متاح")
+    muted_role = guild.get_role(job.params['role_id'])
+    if not muted_role:
+        return  # role deleted meanwhile
+    report_channel = guild.get_channel(job.params['report_channel_id']) if job.params['report_channel_id'] else None
+    await setup_muted_channels(guild, muted_role, report_channel, job)
+
+job_manager.register('muted_setup', run_muted_setup_job)
+
+# Guild id -> lock held while the Muted role is created, so concurrent mutes create it once
+muted_role_locks = {}
+
+async def ensure_muted_role(guild, report_channel=None):
+    """Return the Muted role, creating it and starting the channel fan-out if needed"""
+    muted_role = get_role(guild, "Muted")
+    if not muted_role:
+        lock = muted_role_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            muted_role = get_role(guild, "Muted")  # created while waiting for the lock
+            if not muted_role:
+                muted_role = await enforce(guild, guild.create_role, name="Muted", color=discord.Color.dark_gray())
+                # Cache it now: the role create event may arrive after the next lookup
+                get_role(guild, "Muted")
+                role_name_cache[guild.id].setdefault("Muted", muted_role)
+                share_guild_config(guild.id, 'muted_role_id', muted_role.id)
+                start_muted_setup(guild, muted_role, report_channel)
+                return muted_role
+    if guild.id in muted_overwrites_incomplete:
+        start_muted_setup(guild, muted_role, report_channel)
+    return muted_role
+
+async def reconcile_all_muted_overwrites():
+    """Apply the Muted overwrite to channels created while the bot was offline"""
+    if MUTE_BACKEND != 'role':
+        return
+    for guild in list(bot.guilds):
+        muted_role = get_role(guild, "Muted")
+        if not muted_role or not guild.me.guild_permissions.manage_roles:
+            continue
+        if any(needs_muted_overwrite(channel, muted_role) for channel in guild.channels):
+            start_muted_setup(guild, muted_role)
+
+# Mute backend: "role" (Muted role + channel overwrites) or "timeout" (Discord's native member timeout)
+MUTE_BACKEND = os.getenv('MUTE_BACKEND', 'role').strip().lower()
+if MUTE_BACKEND not in ('role', 'timeout'):
+    error_logger.warning("⚠️ MUTE_BACKEND غير معروف: %s - سيتم استخدام role", MUTE_BACKEND)
+    MUTE_BACKEND = 'role'
+
+if MUTE_BACKEND == 'timeout':
+    MUTE_PERMISSION_ERROR = "❌ البوت لا يملك صلاحية إسكات الأعضاء (Timeout)"
+else:
+    MUTE_PERMISSION_ERROR = "❌ البوت لا يملك صلاحية إدارة الرتب"
+
+def bot_can_mute(guild):
+    """Check if the bot has the permission the mute backend needs"""
+    permissions = guild.me.guild_permissions
+    if MUTE_BACKEND == 'timeout':
+        return permissions.moderate_members
+    return permissions.manage_roles
+
+def is_member_muted(guild, member):
+    """Check if a member is muted with the configured backend"""
+    if MUTE_BACKEND == 'timeout':
+        return member.is_timed_out()
+    muted_role = get_role(guild, "Muted")
+    return bool(muted_role and member.get_role(muted_role.id))
+
+async def apply_mute(guild, member, duration, audit_reason, report_channel=None, muted_role=None):
+    """Mute a member for duration minutes with the configured backend (muted_role: already resolved by the caller)"""
+    if MUTE_BACKEND == 'timeout':
+        # Discord lifts the timeout itself when it expires
+        await enforce(guild, member.timeout, datetime.timedelta(minutes=duration), reason=audit_reason)
+        return
+    if muted_role is None:
+        muted_role = await ensure_muted_role(guild, report_channel)
+    await enforce(guild, member.add_roles, muted_role, reason=audit_reason)
+
+async def lift_mute(guild, member, audit_reason):
+    """Lift a member's mute with the configured backend"""
+    if MUTE_BACKEND == 'timeout':
+        await enforce(guild, member.timeout, None, reason=audit_reason)
+        return
+    muted_role = get_role(guild, "Muted")
+    if muted_role:
+        await enforce(guild, member.remove_roles, muted_role, reason=audit_reason)
 
 def format_time_remaining(seconds):
     """Format time remaining in Arabic"""
@@ -105,722 +414,527 @@ def format_time_remaining(seconds):
     else:
         return f"{remaining_seconds} ثانية"
 
-async def get_mute_info(ctx, member):
-    """Get mute information from audit logs"""
-    try:
-        muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
-        if not muted_role:
-            return None, None, None, None
-        if muted_role not in member.roles:
-            return None, None, None, None
-        
-        # Search for the most recent mute action
-        async for entry in ctx.guild.audit_logs(action=discord.AuditLogAction.member_update, limit=1000):
-            if entry.target == member:
-                for change in entry.changes:
-                    if change.key == 'roles':
-                        if muted_role in change.after and muted_role not in change.before:
-                            reason = entry.reason or "لا يوجد سبب محدد"
-                            if "ميوت بواسطة" in reason:
-                                reason_parts = reason.split(" - السبب: ")
-                                if len(reason_parts) > 1:
-                                    reason = reason_parts[1]
-                                else:
-                                    reason = reason.replace("ميوت بواسطة", "").strip()
-                            
-                            # Map reason to duration - نظام أسباب مختصر ومرن
-                            reason_mapping = {
-                                # أسباب قصيرة المدى (5-15 دقيقة)
-                                "سب": 5, "شت": 5, "كلام": 5, "لفظ": 5, "استخدام": 5,
-                                "تجاهل": 10, "تحذير": 10, "تنبيه": 10,
-                                "كذب": 15, "دجل": 15, "خداع": 15,
-                                
-                                # أسباب متوسطة المدى (20-45 دقيقة)
-                                "اساءة": 20, "اهانة": 20, "استهزاء": 20,
-                                "سبام": 30, "تكرار": 30, "مزعج": 30,
-                                "روابط": 45, "اعلان": 45, "دعاية": 45,
-                                
-                                # أسباب طويلة المدى (60-120 دقيقة)
-                                "مخالفة": 60, "قاعدة": 60, "خطأ": 60,
-                                "مشكلة": 90, "مخالفة خطيرة": 90,
-                                "حظر مؤقت": 120, "مخالفة كبيرة": 120,
-                                "نقاشات": 60, "سياسة": 60, "ديني": 60
-                            }
-                            
-                            # تحديد المدة بناءً على أول كلمة في السبب
-                            duration_minutes = 15  # مدة افتراضية
-                            
-                            # تقسيم السبب إلى كلمات والبحث عن أول كلمة مطابقة
-                            reason_words = reason.lower().split()
-                            
-                            for word in reason_words:
-                                for keyword, dur in reason_mapping.items():
-                                    if keyword in word or word in keyword:
-                                        duration_minutes = dur
-                                        break
-                                if duration_minutes != 15:  # إذا تم العثور على مطابقة
-                                    break
-                            
-                            mute_time = entry.created_at
-                            current_time = datetime.datetime.now(mute_time.tzinfo)
-                            elapsed_time = (current_time - mute_time).total_seconds()
-                            remaining_time = (duration_minutes * 60) - elapsed_time
-                            
-                            return reason, entry.user, mute_time, remaining_time
-        
-        return "لا يوجد سبب محدد", ctx.guild.me, datetime.datetime.now(), 30 * 60
-    except Exception as e:
-        print(f"Error in get_mute_info: {e}")
-        return "لا يوجد سبب محدد", ctx.guild.me, datetime.datetime.now(), 30 * 60
+# Mute reasons - نظام أسباب مختصر ومرن (الكلمة -> المدة بالدقائق)
+MUTE_REASONS = {
+    # أسباب قصيرة المدى (5-15 دقيقة)
+    "سب": 5, "شت": 5, "كلام": 5, "لفظ": 5, "استخدام": 5,
+    "تجاهل": 10, "تحذير": 10, "تنبيه": 10,
+    "كذب": 15, "دجل": 15, "خداع": 15,
+    
+    # أسباب متوسطة المدى (20-45 دقيقة)
+    "اساءة": 20, "اهانة": 20, "استهزاء": 20,
+    "سبام": 30, "تكرار": 30, "مزعج": 30,
+    "روابط": 45, "اعلان": 45, "دعاية": 45,
+    
+    # أسباب طويلة المدى (60-120 دقيقة)
+    "مخالفة": 60, "قاعدة": 60, "خطأ": 60,
+    "مشكلة": 90, "مخالفة خطيرة": 90,
+    "حظر مؤقت": 120, "مخالفة كبيرة": 120,
+    "نقاشات": 60, "سياسة": 60, "ديني": 60
+}
+DEFAULT_MUTE_DURATION = 15
+DEFAULT_MUTE_REASON = "مخالفة عامة"
 
-# Bot commands
-@bot.command(name='اسكات')
-async def show_mute_info(ctx):
-    """Show list of muted members (admin only)"""
-    log_command_usage(ctx, 'اسكات')
-    
-    if not has_admin_permissions(ctx):
-        await ctx.respond("❌ ليس لديك صلاحيات كافية لاستخدام هذا الأمر", ephemeral=True)
-        return
-    
-    # Get muted role
-    muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
-    
-    if not muted_role:
-        embed = discord.Embed(
-            title="🔇 قائمة الأعضاء المسكات",
-            description="لا يوجد أعضاء مسكات حالياً",
-            color=discord.Color.green()
-        )
-        await ctx.respond(embed=embed, ephemeral=True)
-        return
-    
-    # Get all muted members
-    muted_members = [member for member in ctx.guild.members if muted_role in member.roles]
-    
-    if not muted_members:
-        embed = discord.Embed(
-            title="🔇 قائمة الأعضاء المسكات",
-            description="لا يوجد أعضاء مسكات حالياً",
-            color=discord.Color.green()
-        )
-        await ctx.respond(embed=embed, ephemeral=True)
-        return
-    
-    # Create embed with muted members list
-    embed = discord.Embed(
-        title="🔇 قائمة الأعضاء المسكات",
-        description=f"عدد الأعضاء المسكات: {len(muted_members)}",
-        color=discord.Color.red()
-    )
-    
-    # Add each muted member to the embed
-    for i, member in enumerate(muted_members, 1):
-        embed.add_field(
-            name=f"{i}. {member.display_name}",
-            value=f"ID: {member.id}\nانضم: {member.joined_at.strftime('%Y-%m-%d') if member.joined_at else 'غير معروف'}",
-            inline=True
-        )
-    
-    embed.set_footer(text="استخدم !تكلم @عضو لإلغاء الإسكات")
-    
-    await ctx.respond(embed=embed, ephemeral=True)
+# توحيد أشكال الحروف: أ إ آ -> ا ، ة -> ه ، ى -> ي ، وحذف التشكيل والتطويل
+ARABIC_NORMALIZATION = str.maketrans(
+    {"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ة": "ه", "ى": "ي", "ـ": None,
+     **{chr(code): None for code in range(0x064B, 0x0653)}}
+)
 
-@bot.command(name='اسكت')
-async def mute_member_direct(ctx, member: discord.Member, *, reason: str = "لا يوجد سبب محدد"):
-    """Direct mute with reason (admin only)"""
-    log_command_usage(ctx, 'اسكت')
-    
-    if not has_admin_permissions(ctx):
-        await ctx.respond("❌ ليس لديك صلاحيات كافية لاستخدام هذا الأمر", ephemeral=True)
-        return
-    
-    # Validate member
-    can_target, error_msg = validate_member_permissions(ctx, member)
-    if not can_target:
-        await ctx.respond(f"❌ {error_msg}", ephemeral=True)
-        return
-    
-    try:
-        # Create muted role
-        muted_role = await create_muted_role(ctx)
-        
-        # Map reason to duration - نظام أسباب مختصر ومرن
-        reason_mapping = {
-            # أسباب قصيرة المدى (5-15 دقيقة)
-            "سب": 5, "شت": 5, "كلام": 5, "لفظ": 5, "استخدام": 5,
-            "تجاهل": 10, "تحذير": 10, "تنبيه": 10,
-            "كذب": 15, "دجل": 15, "خداع": 15,
-            
-            # أسباب متوسطة المدى (20-45 دقيقة)
-            "اساءة": 20, "اهانة": 20, "استهزاء": 20,
-            "سبام": 30, "تكرار": 30, "مزعج": 30,
-            "روابط": 45, "اعلان": 45, "دعاية": 45,
-            
-            # أسباب طويلة المدى (60-120 دقيقة)
-            "مخالفة": 60, "قاعدة": 60, "خطأ": 60,
-            "مشكلة": 90, "مخالفة خطيرة": 90,
-            "حظر مؤقت": 120, "مخالفة كبيرة": 120,
-            "نقاشات": 60, "سياسة": 60, "ديني": 60
-        }
-        
-        # تحديد المدة بناءً على أول كلمة في السبب
-        duration = 15  # مدة افتراضية
-        matched_reason = "مخالفة عامة"
-        
-        # تقسيم السبب إلى كلمات والبحث عن أول كلمة مطابقة
-        reason_words = reason.lower().split()
-        
-        for word in reason_words:
-            for keyword, dur in reason_mapping.items():
-                if keyword in word or word in keyword:
-                    duration = dur
-                    matched_reason = keyword
-                    break
-            if matched_reason != "مخالفة عامة":
+def normalize_reason_words(text):
+    """Split text into normalized Arabic words for keyword matching"""
+    return re.findall(r"\w+", text.lower().translate(ARABIC_NORMALIZATION))
+
+def build_reason_matcher(reasons):
+    """Compile the reasons table into a word trie (multi-word phrases supported)"""
+    root = {}
+    for keyword, duration in reasons.items():
+        node = root
+        for word in normalize_reason_words(keyword):
+            node = node.setdefault(word, {})
+        node[None] = (keyword, duration)
+    return root
+
+reason_matcher = build_reason_matcher(MUTE_REASONS)
+
+def _reason_step(node, word):
+    """Follow one word in the trie, allowing the definite article (ال) prefix"""
+    child = node.get(word)
+    if child is None and word.startswith("ال") and len(word) > 3:
+        child = node.get(word[2:])
+    return child
+
+def match_mute_reason(reason):
+    """Return (keyword, duration) for the first keyword in the reason; longest phrase wins"""
+    words = normalize_reason_words(reason or "")
+    for start in range(len(words)):
+        match = None
+        node = reason_matcher
+        for word in words[start:]:
+            node = _reason_step(node, word)
+            if node is None:
                 break
-        
-        # Check if bot has permission to manage roles
-        if not ctx.guild.me.guild_permissions.manage_roles:
-            await ctx.respond("❌ البوت لا يملك صلاحية إدارة الرتب", ephemeral=True)
-            return
-        
-        # Check if bot can manage the target member's roles
-        if member.top_role >= ctx.guild.me.top_role:
-            await ctx.respond("❌ لا يمكن إسكات عضو برتبة أعلى من رتبة البوت", ephemeral=True)
-            return
-        
-        # Apply mute
-        try:
-            await member.add_roles(muted_role, reason=f"ميوت بواسطة {ctx.author} - السبب: {reason}")
-        except discord.Forbidden:
-            await ctx.respond("❌ البوت لا يملك صلاحيات كافية لإضافة الرتب", ephemeral=True)
-            return
-        except Exception as e:
-            await ctx.respond(f"❌ حدث خطأ أثناء الإسكات: {str(e)}", ephemeral=True)
-            return
-        
-        # Create embed
-        embed = discord.Embed(
-            title="✅ تم الإسكات بنجاح",
-            description=f"تم إسكات {member.mention}",
-            color=discord.Color.red()
-        )
-        embed.add_field(name="السبب", value=f"{matched_reason} ({reason})", inline=True)
-        embed.add_field(name="المدة", value=f"{duration} دقيقة", inline=True)
-        embed.add_field(name="بواسطة", value=ctx.author.mention, inline=True)
-        embed.set_footer(text=f"سيتم إلغاء الإسكات تلقائياً بعد {duration} دقيقة")
-        
-        await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
-        
-        # Schedule unmute
-        task_key = f"{member.id}_{ctx.guild.id}"
-        
-        async def unmute_after_duration():
-            await asyncio.sleep(duration * 60)
-            try:
-                # Check if member still has muted role
-                if muted_role in member.roles:
-                    await member.remove_roles(muted_role, reason="انتهاء مدة الميوت")
-                    
-                    # Send notification to mute-log channel
-                    try:
-                        mute_log_channel = discord.utils.get(ctx.guild.channels, name="mute-log")
-                        if mute_log_channel:
-                            embed = discord.Embed(
-                                title="✅ تم إلغاء الإسكات تلقائياً",
-                                description=f"تم إلغاء إسكات {member.mention} بعد انتهاء المدة",
-                                color=discord.Color.green()
-                            )
-                            embed.add_field(name="المدة", value=f"{duration} دقيقة", inline=True)
-                            embed.add_field(name="السبب", value=f"{matched_reason} ({reason})", inline=True)
-                            embed.add_field(name="التاريخ", value=datetime.datetime.now().strftime("%d-%B-%Y"), inline=True)
-                            await mute_log_channel.send(embed=embed)
-                        else:
-                            print("❌ روم mute-log غير موجود")
-                    except Exception as e:
-                        print(f"Error sending unmute notification: {e}")
-                        
-            except Exception as e:
-                print(f"Error in unmute task: {e}")
-            finally:
-                # Remove task from tracking
-                if task_key in active_unmute_tasks:
-                    del active_unmute_tasks[task_key]
-        
-        # Create and track the task
-        task = asyncio.create_task(unmute_after_duration())
-        active_unmute_tasks[task_key] = task
-        
+            match = node.get(None, match)
+        if match:
+            return match
+    return DEFAULT_MUTE_REASON, DEFAULT_MUTE_DURATION
+
+def record_mute(guild, member, reason, matched_reason, duration, moderator):
+    """Record a mute issued by the bot in the local ledger"""
+    moderation_logger.info("🔇 %s muted %s for %s min (%s)", moderator, member, duration, reason,
+                           extra={'action': 'mute', 'guild_id': guild.id, 'member_id': member.id,
+                                  'moderator_id': moderator.id, 'duration': duration, 'reason': reason})
+    try:
+        store.record_mute(guild.id, member.id, reason, matched_reason, duration, moderator.id, time.time())
     except Exception as e:
-        await ctx.respond(f"❌ حدث خطأ: {str(e)}", ephemeral=True)
+        error_logger.error("Error recording mute: %s", e)
 
-@bot.command(name='تكلم')
-async def unmute_member(ctx, member: discord.Member):
-    """Unmute member (admin only)"""
-    log_command_usage(ctx, 'تكلم')
-    
-    if not has_admin_permissions(ctx):
-        await ctx.respond("❌ ليس لديك صلاحيات كافية لاستخدام هذا الأمر", ephemeral=True)
-        return
-    
+def close_mute(guild, member):
+    """Mark a member's mute as lifted in the local ledger"""
+    moderation_logger.info("🔊 %s unmuted", member,
+                           extra={'action': 'unmute', 'guild_id': guild.id, 'member_id': member.id})
     try:
-        # Check if bot has permission to manage roles
-        if not ctx.guild.me.guild_permissions.manage_roles:
-            await ctx.respond("❌ البوت لا يملك صلاحية إدارة الرتب", ephemeral=True)
-            return
-        
-        muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
-        if not muted_role:
-            await ctx.respond("❌ لا يوجد دور 'Muted' في السيرفر", ephemeral=True)
-            return
-        
-        if muted_role not in member.roles:
-            await ctx.respond(f"❌ {member.mention} غير مكتوم أصلاً", ephemeral=True)
-            return
-        
-        # Check if bot can manage the target member's roles
-        if member.top_role >= ctx.guild.me.top_role:
-            await ctx.respond("❌ لا يمكن إلغاء إسكات عضو برتبة أعلى من رتبة البوت", ephemeral=True)
-            return
-        
-        # Cancel any pending unmute task
-        task_key = f"{member.id}_{ctx.guild.id}"
-        if task_key in active_unmute_tasks:
-            try:
-                active_unmute_tasks[task_key].cancel()
-                del active_unmute_tasks[task_key]
-            except Exception as e:
-                print(f"Error canceling unmute task: {e}")
-        
-        try:
-            await member.remove_roles(muted_role, reason=f"إلغاء ميوت بواسطة {ctx.author}")
-        except discord.Forbidden:
-            await ctx.respond("❌ البوت لا يملك صلاحيات كافية لإزالة الرتب", ephemeral=True)
-            return
-        except Exception as e:
-            await ctx.respond(f"❌ حدث خطأ أثناء إلغاء الإسكات: {str(e)}", ephemeral=True)
-            return
-        
-        embed = discord.Embed(
-            title="✅ تم إلغاء الإسكات",
-            description=f"تم إلغاء إسكات {member.mention}",
-            color=discord.Color.green()
-        )
-        embed.add_field(name="بواسطة", value=ctx.author.mention, inline=True)
-        
-        await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
-        
+        store.close_mute(guild.id, member.id, time.time())
     except Exception as e:
-        await ctx.respond(f"❌ حدث خطأ: {str(e)}", ephemeral=True)
+        error_logger.error("Error closing mute record: %s", e)
 
-@bot.command(name='اسكاتي')
-async def check_mute_status(ctx, member: discord.Member = None):
-    """Check mute status (owner only)"""
-    log_command_usage(ctx, 'اسكاتي')
-    
-    if not has_admin_permissions(ctx):
-        await ctx.respond("❌ ليس لديك صلاحيات كافية لاستخدام هذا الأمر", ephemeral=True)
-        return
-    
-    if not member:
-        member = ctx.author
-    
-    muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
-    if not muted_role or muted_role not in member.roles:
-        embed = discord.Embed(
-            title="🔊 حالة الإسكات",
-            description=f"{member.mention} غير مكتوم",
-            color=discord.Color.green()
-        )
-        await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
-        return
-    
-    # Get mute info
-    reason, muter, mute_time, remaining_time = await get_mute_info(ctx, member)
-    
-    embed = discord.Embed(
-        title="🔇 حالة الإسكات",
-        description=f"{member.mention} مكتوم",
-        color=discord.Color.red()
-    )
-    embed.add_field(name="السبب", value=reason, inline=True)
-    embed.add_field(name="بواسطة", value=muter.mention if muter else "غير معروف", inline=True)
-    embed.add_field(name="الوقت المتبقي", value=format_time_remaining(remaining_time), inline=True)
-    
-    await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
+# Audit log ingestion - moderation actions done by hand or by other tools
+AUDIT_ACTIONS_TRACKED = {
+    discord.AuditLogAction.ban,
+    discord.AuditLogAction.unban,
+    discord.AuditLogAction.kick,
+    discord.AuditLogAction.member_role_update,
+    discord.AuditLogAction.member_update,
+}
+AUDIT_BACKFILL_LIMIT = 500
 
-@bot.command(name='مساعدة')
-async def help_command(ctx):
-    """Show help information (owner only)"""
-    log_command_usage(ctx, 'مساعدة')
-    
-    if not is_owner(ctx):
-        await ctx.respond("❌ هذا الأمر متاح لأونر السيرفر فقط", ephemeral=True)
-        return
-    
-    embed = discord.Embed(
-        title="🤖 أوامر بوت FSociety",
-        description="قائمة بجميع الأوامر المتاحة",
-        color=discord.Color.blue()
-    )
-    
-    embed.add_field(
-        name="🎭 أوامر الإدارة",
-        value="""
-`اسكت @عضو السبب` - إسكات العضو (أول كلمة من السبب)
-`تكلم @عضو` - إلغاء إسكات العضو
-`اسكات` - عرض قائمة الأعضاء المسكات
-`اسباب` - عرض قائمة الأسباب المتاحة
-`باند @عضو السبب` - حظر العضو
-`كيك @عضو السبب` - طرد العضو
-`مسح عدد` - حذف رسائل محددة
-`مسح الكل` - حذف جميع الرسائل
-`مساعدة` - عرض هذه القائمة
-`حالة` - فحص حالة البوت
-        """,
-        inline=False
-    )
-    
-    embed.add_field(
-        name="👑 أوامر الأونر",
-        value="""
-`اضافة @عضو` - إضافة رتبة الأونر
-`حذف @عضو` - إزالة رتبة الأونر
-        """,
-        inline=False
-    )
-    
-    embed.add_field(
-        name="🔇 نظام الأسباب المختصرة",
-        value="""
-**قصيرة المدى (5-15 دقيقة):**
-`سب` `شت` `كلام` `لفظ` `استخدام` (5 دقائق)
-`تجاهل` `تحذير` `تنبيه` (10 دقائق)
-`كذب` `دجل` `خداع` (15 دقيقة)
-
-**متوسطة المدى (20-45 دقيقة):**
-`اساءة` `اهانة` `استهزاء` (20 دقيقة)
-`سبام` `تكرار` `مزعج` (30 دقيقة)
-`روابط` `اعلان` `دعاية` (45 دقيقة)
-
-**طويلة المدى (60-120 دقيقة):**
-`مخالفة` `قاعدة` `خطأ` `نقاشات` `سياسة` `ديني` (60 دقيقة)
-`مشكلة` `مخالفة خطيرة` (90 دقيقة)
-`حظر مؤقت` `مخالفة كبيرة` (120 دقيقة)
-        """,
-        inline=False
-    )
-    
-    embed.add_field(
-        name="📝 ملاحظات",
-        value="""
-• جميع الأوامر تحتاج صلاحيات الأونر
-• اكتب الأمر مباشرة بدون بادئة
-• الأوامر تعمل باللغة العربية فقط
-• اكتب أول كلمة من السبب فقط
-        """,
-        inline=False
-    )
-    
-    embed.set_footer(text="FSociety Bot v1.0")
-    
-    # إرسال الرسالة كخاصة للأونر فقط
-    await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
+def audit_event_from_entry(entry):
+    """Convert an audit log entry into a row for the local event store"""
+    roles_added = []
+    roles_removed = []
+    if entry.action == discord.AuditLogAction.member_role_update:
+        roles_added = [role.id for role in getattr(entry.after, 'roles', None) or []]
+        roles_removed = [role.id for role in getattr(entry.before, 'roles', None) or []]
+    
+    timed_out_until = getattr(entry.after, 'timed_out_until', None)
+    target = entry.target
+    
+    return {
+        'entry_id': entry.id,
+        'action': entry.action.name,
+        'target_id': target.id if target is not None else None,
+        'user_id': entry.user.id if entry.user else getattr(entry, 'user_id', None),
+        'reason': entry.reason,
+        'created_at': entry.created_at.timestamp(),
+        'timed_out_until': timed_out_until.timestamp() if timed_out_until else None,
+        'roles_added': roles_added,
+        'roles_removed': roles_removed,
+    }
 
-@bot.command(name='حالة')
-async def bot_status(ctx):
-    """Check bot status"""
-    log_command_usage(ctx, 'حالة')
-    
-    embed = discord.Embed(
-        title="🤖 حالة البوت",
-        color=discord.Color.green()
-    )
-    
-    embed.add_field(name="الحالة", value="🟢 متصل", inline=True)
-    embed.add_field(name="الاستجابة", value=f"{round(bot.latency * 1000)}ms", inline=True)
-    embed.add_field(name="عدد السيرفرات", value=len(bot.guilds), inline=True)
-    embed.add_field(name="وقت التشغيل", value="متصل", inline=True)
-    
-    await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
+# Guilds whose catch-up finished this session: only then may live entries move the cursor,
+# or the catch-up would start after them and skip what was written while the bot was offline
+audit_caught_up = set()
 
-@bot.command(name='باند')
-async def ban_member(ctx, member: discord.Member, *, reason: str = "لا يوجد سبب محدد"):
-    """Ban member (admin only)"""
-    log_command_usage(ctx, 'باند')
-    
-    if not has_admin_permissions(ctx):
-        await ctx.respond("❌ ليس لديك صلاحيات كافية لاستخدام هذا الأمر", ephemeral=True)
+def ingest_audit_entries(guild, entries, advance=True):
+    """Store the tracked entries and move the guild cursor past all of them (unless advance is False)"""
+    if not entries:
         return
-    
-    # Validate member
-    can_target, error_msg = validate_member_permissions(ctx, member)
-    if not can_target:
-        await ctx.respond(f"❌ {error_msg}", ephemeral=True)
-        return
-    
+    events = [audit_event_from_entry(entry) for entry in entries if entry.action in AUDIT_ACTIONS_TRACKED]
+    cursor = max(entry.id for entry in entries) if advance else None
     try:
-        await member.ban(reason=f"حظر بواسطة {ctx.author} - السبب: {reason}")
-        
-        embed = discord.Embed(
-            title="🔨 تم الحظر بنجاح",
-            description=f"تم حظر {member.mention}",
-            color=discord.Color.dark_red()
-        )
-        embed.add_field(name="السبب", value=reason, inline=True)
-        embed.add_field(name="بواسطة", value=ctx.author.mention, inline=True)
-        
-        await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
-        
+        store.save_audit_events(guild.id, events, cursor)
     except Exception as e:
-        await ctx.respond(f"❌ حدث خطأ: {str(e)}", ephemeral=True)
+        error_logger.error("Error storing audit log entries: %s", e)
 
-@bot.command(name='كيك')
-async def kick_member(ctx, member: discord.Member, *, reason: str = "لا يوجد سبب محدد"):
-    """Kick member (admin only)"""
-    log_command_usage(ctx, 'كيك')
-    
-    if not has_admin_permissions(ctx):
-        await ctx.respond("❌ ليس لديك صلاحيات كافية لاستخدام هذا الأمر", ephemeral=True)
-        return
-    
-    # Validate member
-    can_target, error_msg = validate_member_permissions(ctx, member)
-    if not can_target:
-        await ctx.respond(f"❌ {error_msg}", ephemeral=True)
+async def catch_up_audit_log(guild):
+    """Fetch audit log entries created since the guild's cursor (after a reconnect)"""
+    if not guild.me.guild_permissions.view_audit_log:
         return
     
+    audit_caught_up.discard(guild.id)
+    cursor = store.get_audit_cursor(guild.id)
+    batch = []
     try:
-        await member.kick(reason=f"طرد بواسطة {ctx.author} - السبب: {reason}")
-        
-        embed = discord.Embed(
-            title="👢 تم الطرد بنجاح",
-            description=f"تم طرد {member.mention}",
-            color=discord.Color.orange()
-        )
-        embed.add_field(name="السبب", value=reason, inline=True)
-        embed.add_field(name="بواسطة", value=ctx.author.mention, inline=True)
-        
-        await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
-        
+        if cursor:
+            # after= walks forward from the cursor, oldest first
+            entries = guild.audit_logs(limit=None, after=discord.Object(id=cursor))
+        else:
+            # First run: index only the most recent entries
+            entries = guild.audit_logs(limit=AUDIT_BACKFILL_LIMIT)
+        
+        async for entry in entries:
+            batch.append(entry)
+            if len(batch) >= 100:
+                ingest_audit_entries(guild, batch)
+                batch = []
+        ingest_audit_entries(guild, batch)
+        audit_caught_up.add(guild.id)
+    except discord.Forbidden:
+        return
     except Exception as e:
-        await ctx.respond(f"❌ حدث خطأ: {str(e)}", ephemeral=True)
+        error_logger.error("Error catching up audit log for %s: %s", guild, e)
 
-@bot.command(name='مسح')
-async def clear_messages(ctx, amount: int = 5):
-    """Clear messages (admin only)"""
-    log_command_usage(ctx, 'مسح')
-    
-    if not has_admin_permissions(ctx):
-        await ctx.respond("❌ ليس لديك صلاحيات كافية لاستخدام هذا الأمر", ephemeral=True)
-        return
-    
-    if amount < 1 or amount > 100:
-        await ctx.respond("❌ يرجى تحديد عدد بين 1 و 100", ephemeral=True)
+# Muted member index: guild id -> ids of muted members (kept current by events)
+muted_members_index = {}
+
+def build_muted_index(guild):
+    """Build a guild's muted member set from the member cache"""
+    if MUTE_BACKEND == 'timeout':
+        muted_members_index[guild.id] = {member.id for member in guild.members if member.is_timed_out()}
+    else:
+        muted_role = get_role(guild, "Muted")
+        muted_members_index[guild.id] = {member.id for member in muted_role.members} if muted_role else set()
+    return muted_members_index[guild.id]
+
+def get_muted_members(guild):
+    """Return the guild's muted members without scanning the member list"""
+    muted_ids = muted_members_index.get(guild.id)
+    if muted_ids is None:
+        muted_ids = build_muted_index(guild)
+    
+    muted_members = []
+    for member_id in list(muted_ids):
+        member = guild.get_member(member_id)
+        # Timeouts expire without an event, so drop them here
+        if member is None or not is_member_muted(guild, member):
+            muted_ids.discard(member_id)
+            continue
+        muted_members.append(member)
+    return muted_members
+
+async def build_all_muted_indexes():
+    """Build every guild's muted index once, yielding to the loop between guilds"""
+    for guild in list(bot.guilds):
+        build_muted_index(guild)
+        await asyncio.sleep(0)
+
+def audit_mute_reason(event):
+    """The reason of an audit log mute, without the bot's "ميوت بواسطة ..." prefix"""
+    reason = event['reason'] or "لا يوجد سبب محدد"
+    if "ميوت بواسطة" in reason:
+        reason_parts = reason.split(" - السبب: ")
+        if len(reason_parts) > 1:
+            reason = reason_parts[1]
+        else:
+            reason = reason.replace("ميوت بواسطة", "").strip()
+    return reason
+
+# Startup reconciliation - Muted role holders with no pending unmute (muted while the bot was offline,
+# or before unmutes were persisted) get one, worked out from the ledger or the ingested audit log
+RECONCILE_CONCURRENCY = 2  # guilds reconciled at once
+RECONCILE_BATCH = 100  # members checked between yields to the loop
+reconcile_slots = None  # created on first use: on Python < 3.10 it binds to the loop current at creation
+reconciling_guilds = set()
+
+def muted_member_expiry(guild, member, muted_role):
+    """Return (expires_at, duration, reason, matched_reason) for a muted member without a pending unmute,
+    or None if neither the ledger nor a dated audit entry tells when the mute started"""
+    record = store.get_active_mute(guild.id, member.id)
+    if record:
+        return (record['issued_at'] + record['duration'] * 60, record['duration'],
+                record['reason'], record['matched_reason'])
+    
+    event = store.find_role_grant(guild.id, member.id, muted_role.id)
+    if event and event['created_at']:
+        reason = audit_mute_reason(event)
+        matched_reason, duration = match_mute_reason(reason)
+        return event['created_at'] + duration * 60, duration, reason, matched_reason
+    
+    # No trace of who muted them or when: leave them to the moderators rather than invent a deadline
+    return None
+
+async def reconcile_muted_members(guild):
+    """Schedule an unmute for every Muted role holder that has none and a known mute start; overdue ones are released at once"""
+    muted_role = get_role(guild, "Muted")
+    if not muted_role:
+        return 0
+    mute_scheduler.load()
+    scheduled = overdue = 0
+    now = time.time()
+    # The muted index, not muted_role.members: that property scans the whole member cache
+    for i, member in enumerate(get_muted_members(guild), 1):
+        expiry = None
+        if mute_scheduler.get(guild.id, member.id) is None:
+            expiry = muted_member_expiry(guild, member, muted_role)
+        if expiry is not None:
+            expires_at, duration, reason, matched_reason = expiry
+            mute_scheduler.schedule(guild.id, member.id, duration, reason, matched_reason, expires_at=expires_at)
+            scheduled += 1
+            overdue += expires_at <= now
+        if i % RECONCILE_BATCH == 0:
+            await asyncio.sleep(0)
+    if scheduled:
+        moderation_logger.info("🔄 %s: جدولة فك إسكات %s عضو (%s انتهت مدتهم)", guild, scheduled, overdue,
+                               extra={'action': 'reconcile', 'guild_id': guild.id})
+    return scheduled
+
+async def reconcile_guild(guild, release=True):
+    """Catch up a guild's audit log, then reconcile its muted members unless release is False (new guilds)"""
+    global reconcile_slots
+    if guild.id in reconciling_guilds:
         return
-    
+    reconciling_guilds.add(guild.id)
+    if reconcile_slots is None:
+        reconcile_slots = asyncio.Semaphore(RECONCILE_CONCURRENCY)
     try:
-        deleted = await ctx.channel.purge(limit=amount + 1)  # +1 to include command message
-        
-        embed = discord.Embed(
-            title="🗑️ تم الحذف بنجاح",
-            description=f"تم حذف {len(deleted) - 1} رسالة",
-            color=discord.Color.green()
-        )
-        embed.add_field(name="بواسطة", value=ctx.author.mention, inline=True)
-        embed.add_field(name="العدد المطلوب", value=amount, inline=True)
-        
-        await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
-        
+        async with reconcile_slots:
+            remember_guild_config(guild)
+            # Ingest missed audit entries first: they date mutes applied while offline
+            await catch_up_audit_log(guild)
+            if release and MUTE_BACKEND == 'role':
+                await reconcile_muted_members(guild)
     except Exception as e:
-        await ctx.respond(f"❌ حدث خطأ: {str(e)}", ephemeral=True)
+        error_logger.error("Error reconciling %s: %s", guild, e)
+    finally:
+        reconciling_guilds.discard(guild.id)
 
-@bot.command(name='مسح الكل')
-async def clear_all_messages(ctx):
-    """Clear all messages in channel (admin only)"""
-    log_command_usage(ctx, 'مسح الكل')
-    
-    if not has_admin_permissions(ctx):
-        await ctx.respond("❌ ليس لديك صلاحيات كافية لاستخدام هذا الأمر", ephemeral=True)
-        return
-    
+async def get_mute_info(ctx, member):
+    """Get mute information from the local ledger (audit logs for mutes made outside the bot)"""
     try:
-        # Get channel history to count messages
-        messages = []
-        async for message in ctx.channel.history(limit=None):
-            messages.append(message)
-        
-        # Delete all messages except pinned ones
-        deleted = await ctx.channel.purge(limit=None, check=lambda m: not m.pinned)
-        
-        embed = discord.Embed(
-            title="🗑️ تم حذف جميع الرسائل",
-            description=f"تم حذف {len(deleted)} رسالة",
-            color=discord.Color.red()
-        )
-        embed.add_field(name="بواسطة", value=ctx.author.mention, inline=True)
-        embed.add_field(name="الرسائل المثبتة", value="لم يتم حذفها", inline=True)
+        if not is_member_muted(ctx.guild, member):
+            return None, None, None, None
         
-        await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
+        # Mutes issued by the bot are answered locally without any API call
+        record = store.get_active_mute(ctx.guild.id, member.id)
+        if record:
+            muter = ctx.guild.get_member(record['moderator_id']) if record['moderator_id'] else None
+            mute_time = datetime.datetime.fromtimestamp(record['issued_at'], tz=datetime.timezone.utc)
+            remaining_time = record['issued_at'] + record['duration'] * 60 - time.time()
+            return record['reason'], muter, mute_time, remaining_time
+        
+        # Fallback for mutes applied outside the bot: the locally ingested audit log
+        if MUTE_BACKEND == 'timeout':
+            event = store.find_latest_timeout(ctx.guild.id, member.id)
+        else:
+            event = store.find_role_grant(ctx.guild.id, member.id, get_role(ctx.guild, "Muted").id)
+        if event:
+            reason = audit_mute_reason(event)
+            
+            # Map reason to duration
+            _, duration_minutes = match_mute_reason(reason)
+            
+            muter = ctx.guild.get_member(event['user_id']) if event['user_id'] else None
+            mute_time = datetime.datetime.fromtimestamp(event['created_at'], tz=datetime.timezone.utc)
+            if event['timed_out_until']:
+                remaining_time = event['timed_out_until'] - time.time()
+            else:
+                remaining_time = event['created_at'] + duration_minutes * 60 - time.time()
+            
+            return reason, muter, mute_time, remaining_time
         
+        return "لا يوجد سبب محدد", ctx.guild.me, datetime.datetime.now(), 30 * 60
     except Exception as e:
-        await ctx.respond(f"❌ حدث خطأ: {str(e)}", ephemeral=True)
+        error_logger.error("Error in get_mute_info: %s", e)
+        return "لا يوجد سبب محدد", ctx.guild.me, datetime.datetime.now(), 30 * 60
 
-@bot.command(name='اضافة')
-async def add_role(ctx, member: discord.Member):
-    """Add owner role to member (owner only)"""
-    log_command_usage(ctx, 'اضافة')
+# Bot events
+@bot.event
+async def on_ready():
+    command_logger.info('✅ %s تم تسجيل الدخول بنجاح!', bot.user)
+    command_logger.info('🆔 Bot ID: %s', bot.user.id)
+    command_logger.info('📊 عدد السيرفرات: %s', len(bot.guilds))
     
-    if not is_owner(ctx):
-        await ctx.respond("❌ هذا الأمر متاح لأونر السيرفر فقط", ephemeral=True)
-        return
+    # Start the unmute scheduler (reloads pending unmutes from disk); in a cluster, only on the lease holder
+    if CLUSTERED:
+        expiry_lease.start()
+    else:
+        mute_scheduler.start()
+    command_logger.info('🔄 المهام النشطة: %s', len(mute_scheduler))
     
-    try:
-        # Get or create owner role
-        owner_role = discord.utils.get(ctx.guild.roles, name="owner")
-        if not owner_role:
-            owner_role = await ctx.guild.create_role(
-                name="owner",
-                color=discord.Color.gold(),
-                reason="إنشاء رتبة الأونر بواسطة البوت"
-            )
-        
-        # Add role to member
-        await member.add_roles(owner_role, reason=f"إضافة رتبة الأونر بواسطة {ctx.author}")
-        
-        embed = discord.Embed(
-            title="✅ تم إضافة الرتبة بنجاح",
-            description=f"تم إضافة رتبة الأونر لـ {member.mention}",
-            color=discord.Color.green()
-        )
-        embed.add_field(name="بواسطة", value=ctx.author.mention, inline=True)
-        embed.add_field(name="الرتبة", value=owner_role.mention, inline=True)
-        
-        await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
-        
-    except Exception as e:
-        await ctx.respond(f"❌ حدث خطأ: {str(e)}", ephemeral=True)
-
-@bot.command(name='حذف')
-async def remove_role(ctx, member: discord.Member):
-    """Remove owner role from member (owner only)"""
-    log_command_usage(ctx, 'حذف')
+    # Resume background jobs interrupted by the last restart
+    job_manager.resume()
     
-    if not is_owner(ctx):
-        await ctx.respond("❌ هذا الأمر متاح لأونر السيرفر فقط", ephemeral=True)
-        return
+    # Index muted members once so listings never scan the member list
+    asyncio.create_task(build_all_muted_indexes())
     
-    try:
-        # Get owner role
-        owner_role = discord.utils.get(ctx.guild.roles, name="owner")
-        if not owner_role:
-            await ctx.respond("❌ رتبة الأونر غير موجودة", ephemeral=True)
-            return
-        
-        # Check if member has the role
-        if owner_role not in member.roles:
-            await ctx.respond("❌ هذا العضو لا يملك رتبة الأونر", ephemeral=True)
-            return
-        
-        # Remove role from member
-        await member.remove_roles(owner_role, reason=f"إزالة رتبة الأونر بواسطة {ctx.author}")
-        
-        embed = discord.Embed(
-            title="✅ تم إزالة الرتبة بنجاح",
-            description=f"تم إزالة رتبة الأونر من {member.mention}",
-            color=discord.Color.orange()
-        )
-        embed.add_field(name="بواسطة", value=ctx.author.mention, inline=True)
-        embed.add_field(name="الرتبة", value=owner_role.mention, inline=True)
-        
-        await ctx.respond(embed=embed, ephemeral=True, delete_after=7)
-        
-    except Exception as e:
-        await ctx.respond(f"❌ حدث خطأ: {str(e)}", ephemeral=True)
+    # Apply the Muted overwrite to channels created while offline
+    asyncio.create_task(reconcile_all_muted_overwrites())
+
+@bot.event
+async def on_guild_available(guild):
+    # Fires per guild after every fresh session (startup, outages): audit catch-up + muted member sweep
+    asyncio.create_task(reconcile_guild(guild))
+
+@bot.event
+async def on_guild_join(guild):
+    # Members muted before the bot joined aren't its mutes: don't schedule releases for them
+    asyncio.create_task(reconcile_guild(guild, release=False))
+
+# Connection state per shard: sharded bots also dispatch the unsharded events, so those are ignored there
+@bot.event
+async def on_connect():
+    if not SHARDED:
+        gateway_up()
+    health_monitor.start()
+
+@bot.event
+async def on_resumed():
+    if not SHARDED:
+        gateway_up()
+
+@bot.event
+async def on_disconnect():
+    if not SHARDED:
+        gateway_down()
 
-# Error handling
 @bot.event
-async def on_command_error(ctx, error):
-    if isinstance(error, commands.CommandNotFound):
-        return
-    if hasattr(error, 'original') or hasattr(error, 'handled'):
+async def on_shard_connect(shard_id):
+    gateway_up(shard_id)
+
+@bot.event
+async def on_shard_resumed(shard_id):
+    gateway_up(shard_id)
+
+@bot.event
+async def on_shard_disconnect(shard_id):
+    gateway_down(shard_id)
+
+def gateway_up(shard_id=None):
+    """Mark a shard connected and record how long its outage (if any) lasted"""
+    health_monitor.set_connected(True, shard_id)
+    down_since = gateway_down_since.pop(shard_id, None)
+    if down_since is not None:
+        gateway_outages.observe(time.monotonic() - down_since)
+
+def gateway_down(shard_id=None):
+    health_monitor.set_connected(False, shard_id)
+    gateway_down_since.setdefault(shard_id, time.monotonic())
+
+@bot.event
+async def on_audit_log_entry_create(entry):
+    ingest_audit_entries(entry.guild, [entry], advance=entry.guild.id in audit_caught_up)
+
+@bot.event
+async def on_member_update(before, after):
+    roles_changed = before.roles != after.roles
+    if roles_changed:
+        invalidate_member_permissions(after.guild, after.id)
+    elif before.timed_out_until == after.timed_out_until:
         return
-    if isinstance(error, (commands.MissingRequiredArgument, commands.MemberNotFound, commands.BadArgument)):
+    
+    muted_ids = muted_members_index.get(after.guild.id)
+    if muted_ids is None:
         return
     
-    # Log the error for debugging
-    print(f"❌ خطأ في الأمر '{ctx.command}' بواسطة {ctx.author}: {error}")
+    if is_member_muted(after.guild, after):
+        muted_ids.add(after.id)
+    else:
+        muted_ids.discard(after.id)
+
+@bot.event
+async def on_member_remove(member):
+    invalidate_member_permissions(member.guild, member.id)
+    muted_ids = muted_members_index.get(member.guild.id)
+    if muted_ids is not None:
+        muted_ids.discard(member.id)
+
+@bot.event
+async def on_guild_role_create(role):
+    role_name_cache.pop(role.guild.id, None)
+    admin_permission_cache.pop(role.guild.id, None)
+    if role.name == "Muted":
+        muted_members_index.pop(role.guild.id, None)
+
+@bot.event
+async def on_guild_role_delete(role):
+    role_name_cache.pop(role.guild.id, None)
+    admin_permission_cache.pop(role.guild.id, None)
+    if role.name == "Muted":
+        muted_members_index.pop(role.guild.id, None)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    if before.name != after.name or before.position != after.position:
+        role_name_cache.pop(after.guild.id, None)
+    if before.name != after.name or before.position != after.position or before.permissions != after.permissions:
+        admin_permission_cache.pop(after.guild.id, None)
+    if before.name != after.name and "Muted" in (before.name, after.name):
+        muted_members_index.pop(after.guild.id, None)
+
+@bot.event
+async def on_guild_channel_create(channel):
+    channel_name_cache.pop(channel.guild.id, None)
     
-    error_message = "❌ حدث خطأ في تنفيذ الأمر"
-    try:
-        await ctx.respond(error_message, ephemeral=True)
-    except:
+    # Keep new channels closed to the Muted role
+    muted_role = get_role(channel.guild, "Muted") if MUTE_BACKEND == 'role' else None
+    if muted_role and needs_muted_overwrite(channel, muted_role):
         try:
-            await ctx.send(error_message)
-        except:
+            await outbound.call(channel.guild.id, BACKGROUND, channel.set_permissions, muted_role,
+                                reason="إعداد رتبة Muted", **muted_overwrite_for(channel))
+        except discord.Forbidden:
             pass
+        except Exception as e:
+            error_logger.warning("Error setting permissions for %s: %s", channel.name, e)
 
-# Bot events
 @bot.event
-async def on_ready():
-    print(f'✅ {bot.user} تم تسجيل الدخول بنجاح!')
-    print(f'🆔 Bot ID: {bot.user.id}')
-    print(f'📊 عدد السيرفرات: {len(bot.guilds)}')
-    print(f'🔄 المهام النشطة: {len(active_unmute_tasks)}')
+async def on_guild_channel_delete(channel):
+    channel_name_cache.pop(channel.guild.id, None)
+    webhook = mute_log_webhooks.get(channel.guild.id)
+    if webhook and webhook.channel_id == channel.id:
+        mute_log_webhooks.pop(channel.guild.id, None)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    if before.name != after.name or before.position != after.position:
+        channel_name_cache.pop(after.guild.id, None)
+
+@bot.event
+async def on_guild_update(before, after):
+    if before.owner_id != after.owner_id:
+        admin_permission_cache.pop(after.id, None)
+
+@bot.event
+async def on_guild_remove(guild):
+    admin_permission_cache.pop(guild.id, None)
+    role_name_cache.pop(guild.id, None)
+    channel_name_cache.pop(guild.id, None)
+    muted_members_index.pop(guild.id, None)
+    muted_role_locks.pop(guild.id, None)
+    audit_caught_up.discard(guild.id)
+    mute_log_webhooks.pop(guild.id, None)
 
 @bot.event
 async def on_message(message):
-    # Ignore messages from the bot itself
-    if message.author == bot.user:
+    # Ignore messages from the bot itself, and everything once shutdown has started
+    if message.author == bot.user or not accepting_commands:
+        return
+    
+    # Chat logging is off by default (LOG_LEVEL_CHAT) and sampled when on
+    if chat_logger.isEnabledFor(logging.INFO):
+        chat_logger.info("📝 رسالة من %s: %s", message.author, message.content,
+                         extra={'guild_id': message.guild.id if message.guild else None,
+                                'channel_id': message.channel.id, 'user_id': message.author.id})
+    
+    # Commands only work inside servers
+    if message.guild is None:
+        return
+    
+    # Resolve the command once through the routing table (see "Command routing" below)
+    started = time.perf_counter()
+    route = resolve_command(message.content)
+    if route is None:
         return
     
-    # Debug: Log all messages to see what's happening
-    print(f"📝 رسالة من {message.author}: {message.content}")
-    
-    # Check if message starts with any command (without prefix)
-    content = message.content.strip()
-    
-    # Handle commands directly
-    if content == 'مساعدة':
-        await help_command_direct(message)
-    elif content == 'حالة':
-        await status_command_direct(message)
-    elif content.startswith('اسكت'):
-        await handle_mute_command(message)
-    elif content.startswith('تكلم'):
-        await handle_unmute_command(message)
-    elif content == 'اسكات':
-        await handle_mute_list_command(message)
-    elif content == 'اسباب':
-        await handle_mute_reasons_command(message)
-    elif content.startswith('باند'):
-        await handle_ban_command(message)
-    elif content.startswith('كيك'):
-        await handle_kick_command(message)
-    elif content.startswith('مسح'):
-        await handle_clear_command(message)
-    elif content.startswith('اضافة رتبة'):
-        await handle_add_custom_role_command(message)
-    elif content.startswith('حذف رتبة'):
-        await handle_remove_custom_role_command(message)
-    elif content.startswith('اضافة لي'):
-        await handle_add_role_to_self_command(message)
-    elif content.startswith('إنشاء رتبة'):
-        await handle_create_admin_role_command(message)
-    elif content.startswith('اضافة'):
-        await handle_add_role_command(message)
-    elif content.startswith('حذف'):
-        await handle_remove_role_command(message)
-    
-    # Process commands normally as fallback
-    await bot.process_commands(message)
+    command_logger.info("Command '%s' used by %s in %s", route.__name__, message.author, message.guild,
+                        extra={'command': route.__name__, 'user_id': message.author.id, 'guild_id': message.guild.id})
+    timings = {'parse': time.perf_counter() - started}
+    token = command_timings.set(timings)
+    task = asyncio.current_task()
+    commands_in_flight.add(task)
+    try:
+        await route(message)
+    finally:
+        commands_in_flight.discard(task)
+        command_timings.reset(token)
+        timings['total'] = time.perf_counter() - started
+        for phase, seconds in timings.items():
+            command_latency.observe(seconds, command=route.__name__, phase=phase)
 
 # Direct command handlers
 async def help_command_direct(message):
     """Show help information directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ هذا الأمر متاح لأونر السيرفر فقط")
+        await reply(message.channel, "❌ هذا الأمر متاح لأونر السيرفر فقط")
         return
     
     embed = discord.Embed(
@@ -832,13 +946,15 @@ async def help_command_direct(message):
     embed.add_field(
         name="🎭 أوامر الإدارة",
         value="""
-`اسكت @عضو السبب` - إسكات العضو (مع مدة تلقائية)
+`اسكت @عضو السبب` - إسكات العضو (مع مدة تلقائية)، يقبل عدة أعضاء
 `تكلم @عضو` - إلغاء إسكات العضو
 `اسكات` - عرض قائمة الأعضاء المسكات
 `اسباب` - عرض قائمة الأسباب والمدة
-`باند @عضو السبب` - حظر العضو
-`كيك @عضو السبب` - طرد العضو
+`باند @عضو السبب` - حظر العضو، يقبل عدة أعضاء
+`كيك @عضو السبب` - طرد العضو، يقبل عدة أعضاء
 `مسح عدد` - حذف رسائل محددة
+`مسح الكل تصفير` - تصفير الروم بالكامل (يتطلب تأكيد الأونر)
+`مهام` - عرض المهام • `مهمة رقم` - حالة مهمة • `الغاء مهمة رقم` - إلغاء مهمة
 `مساعدة` - عرض هذه القائمة
 `حالة` - فحص حالة البوت
         """,
@@ -859,7 +975,7 @@ async def help_command_direct(message):
     )
     
     embed.set_footer(text="FSociety Bot v1.0")
-    await message.channel.send(embed=embed, delete_after=7)
+    await reply(message.channel, embed=embed, delete_after=7)
 
 async def status_command_direct(message):
     """Check bot status directly"""
@@ -872,206 +988,364 @@ async def status_command_direct(message):
     embed.add_field(name="الاستجابة", value=f"{round(bot.latency * 1000)}ms", inline=True)
     embed.add_field(name="عدد السيرفرات", value=len(bot.guilds), inline=True)
     
-    await message.channel.send(embed=embed, delete_after=7)
+    await reply(message.channel, embed=embed, delete_after=7)
 
 def is_owner_direct(message):
     """Check if user is server owner or has admin role"""
-    # Check if user is server owner
-    if message.author == message.guild.owner:
-        return True
+    started = time.perf_counter()
+    allowed = check_admin_permissions(message.guild, message.author)
+    add_command_time('authorization', time.perf_counter() - started)
+    return allowed
+
+# Streaming purge (مسح الكل) - runs as a background job, see purge.py / jobs.py
+PURGE_PROGRESS_INTERVAL = 3  # seconds between status message edits
+
+def purge_status_text(job):
+    """Status message of a purge job, including its handle"""
+    return (f"⏳ جاري حذف الرسائل - مهمة #{job.id}: {describe_job_progress(job)}\n"
+            f"`مهمة {job.id}` لعرض الحالة • `الغاء مهمة {job.id}` للإلغاء")
+
+async def start_purge_job(channel, author):
+    """Start deleting a channel's history in the background and post the job handle"""
+    for job in job_manager.active(channel.guild.id, 'purge'):
+        if job.params['channel_id'] == channel.id:
+            await reply(channel, f"⏳ يوجد حذف جارٍ في هذا الروم - مهمة #{job.id}", delete_after=5)
+            return job
+    
+    # The status message is the newest message kept: history is purged from just before it
+    status_message = await reply(channel, "⏳ جاري حذف الرسائل...")
+    job = job_manager.submit(channel.guild.id, 'purge', {
+        'channel_id': channel.id,
+        'status_message_id': status_message.id,
+    }, created_by=author.id)
+    try:
+        await outbound.call(channel.guild.id, REPLY, status_message.edit, content=purge_status_text(job))
+    except discord.HTTPException:
+        pass
+    return job
+
+async def run_purge_job(job):
+    """Job runner: stream-delete a channel's history, resuming from the saved cursor"""
+    guild = bot.get_guild(job.guild_id)
+    channel = guild.get_channel(job.params['channel_id']) if guild else None
+    if channel is None:
+        return  # channel deleted (e.g. reset) - nothing left to purge
+    status_message = channel.get_partial_message(job.params['status_message_id'])
+    last_edit = time.monotonic()
+    
+    async def progress(purge):
+        nonlocal last_edit
+        job.checkpoint(cursor=purge.resume_cursor, deleted=purge.deleted, scanned=purge.scanned, failed=purge.failed)
+        if purge.done or time.monotonic() - last_edit < PURGE_PROGRESS_INTERVAL:
+            return
+        last_edit = time.monotonic()
+        try:
+            await outbound.call(guild.id, REPLY, status_message.edit, content=purge_status_text(job))
+        except discord.HTTPException:
+            pass
     
-    # Check if user has owner role
-    owner_role = discord.utils.get(message.guild.roles, name="owner")
-    if owner_role and owner_role in message.author.roles:
-        return True
+    purge = StreamingPurge(channel, outbound, progress=progress)
+    purge.deleted = job.progress.get('deleted', 0)
+    purge.scanned = job.progress.get('scanned', 0)
+    purge.failed = job.progress.get('failed', 0)
     
-    # Check if user has admin role (any role with admin permissions)
-    admin_roles = ["admin", "Admin", "ADMIN", "مشرف", "مدير", "أدمن"]
-    for role_name in admin_roles:
-        admin_role = discord.utils.get(message.guild.roles, name=role_name)
-        if admin_role and admin_role in message.author.roles:
-            return True
+    try:
+        await purge.run(before=job.progress.get('cursor') or status_message.id)
+    except asyncio.CancelledError:
+        if job_manager.stopping:
+            content = f"⏸️ توقف حذف الرسائل مؤقتاً لإعادة تشغيل البوت - مهمة #{job.id} ستكمل تلقائياً ({purge.deleted} رسالة محذوفة)"
+        else:
+            content = f"⛔ تم إيقاف حذف الرسائل - مهمة #{job.id} ({purge.deleted} رسالة محذوفة)"
+        outbound.submit(guild.id, REPLY, status_message.edit, content=content)
+        raise
+    job.checkpoint(force=True, cursor=None, deleted=purge.deleted, scanned=purge.scanned, failed=purge.failed)
     
-    # Check if user has any role with admin permissions
-    for role in message.author.roles:
-        if role.permissions.administrator or role.permissions.manage_guild:
-            return True
+    embed = discord.Embed(
+        title="🧹 تم حذف جميع الرسائل بنجاح",
+        description=f"تم حذف {purge.deleted} رسالة",
+        color=discord.Color.green()
+    )
+    if purge.failed:
+        embed.add_field(name="تعذر حذفها", value=f"{purge.failed} رسالة", inline=True)
     
-    return False
+    try:
+        await outbound.call(guild.id, REPLY, status_message.edit, content=None, embed=embed)
+        outbound.submit(guild.id, CLEANUP, status_message.delete, delay=5)
+    except discord.NotFound:
+        await reply(channel, embed=embed, delete_after=5)
+
+job_manager.register('purge', run_purge_job)
+
+# Job commands
+JOB_KIND_NAMES = {'purge': 'حذف الرسائل', 'muted_setup': 'إعداد رتبة Muted'}
+JOB_STATE_NAMES = {
+    'queued': '⏳ في الانتظار',
+    'running': '🔄 قيد التنفيذ',
+    'done': '✅ اكتملت',
+    'failed': '❌ فشلت',
+    'cancelled': '⛔ ألغيت',
+}
+
+def describe_job_progress(job):
+    """Short progress text of a job"""
+    progress = job.progress
+    if job.kind == 'purge':
+        return f"{progress.get('deleted', 0)} رسالة محذوفة من {progress.get('scanned', 0)}"
+    if job.kind == 'muted_setup':
+        return f"{progress.get('done', 0)}/{progress.get('total', '?')} قناة"
+    return "-"
+
+def parse_job_id(message):
+    """Return the job id given as the last word of a job command, or None"""
+    words = message.content.split()
+    try:
+        return int(words[-1].lstrip('#'))
+    except (ValueError, IndexError):
+        return None
+
+async def handle_jobs_command(message):
+    """List the guild's recent background jobs"""
+    if not is_owner_direct(message):
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
+        return
+    
+    jobs = job_manager.recent(message.guild.id)
+    if not jobs:
+        await reply(message.channel, "✅ لا توجد مهام", delete_after=7)
+        return
+    
+    lines = [f"#{job.id} • {JOB_KIND_NAMES.get(job.kind, job.kind)} • {JOB_STATE_NAMES.get(job.state, job.state)} • {describe_job_progress(job)}"
+             for job in jobs]
+    embed = discord.Embed(title="📋 المهام", description="\n".join(lines), color=discord.Color.blue())
+    await reply(message.channel, embed=embed, delete_after=15)
+
+async def handle_job_status_command(message):
+    """Show the status of one background job"""
+    if not is_owner_direct(message):
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
+        return
+    
+    job_id = parse_job_id(message)
+    job = job_manager.get(job_id) if job_id is not None else None
+    if job is None or job.guild_id != message.guild.id:
+        await reply(message.channel, "❌ الاستخدام الصحيح: `مهمة رقم_المهمة`")
+        return
+    
+    embed = discord.Embed(title=f"📋 مهمة #{job.id}", color=discord.Color.blue())
+    embed.add_field(name="النوع", value=JOB_KIND_NAMES.get(job.kind, job.kind), inline=True)
+    embed.add_field(name="الحالة", value=JOB_STATE_NAMES.get(job.state, job.state), inline=True)
+    embed.add_field(name="التقدم", value=describe_job_progress(job), inline=True)
+    if job.created_by:
+        embed.add_field(name="بواسطة", value=f"<@{job.created_by}>", inline=True)
+    embed.add_field(name="البداية", value=f"<t:{int(job.created_at)}:R>", inline=True)
+    if job.error:
+        embed.add_field(name="الخطأ", value=job.error[:1024], inline=False)
+    await reply(message.channel, embed=embed, delete_after=15)
+
+async def handle_job_cancel_command(message):
+    """Cancel a queued or running background job"""
+    if not is_owner_direct(message):
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
+        return
+    
+    job_id = parse_job_id(message)
+    job = job_manager.get(job_id) if job_id is not None else None
+    if job is None or job.guild_id != message.guild.id:
+        await reply(message.channel, "❌ الاستخدام الصحيح: `الغاء مهمة رقم_المهمة`")
+        return
+    
+    if not job_manager.cancel(job.id):
+        await reply(message.channel, f"❌ المهمة #{job.id} منتهية بالفعل", delete_after=5)
+        return
+    await reply(message.channel, f"⛔ تم إلغاء المهمة #{job.id}", delete_after=5)
+
+# Bulk moderation - اسكت / باند / كيك تعمل على كل الأعضاء المذكورين في أمر واحد
+# Targets run concurrently; the outbound scheduler bounds how many requests are in flight
+BULK_TARGET_LIMIT = 25
+MENTION_PATTERN = re.compile(r'<@!?\d+>')
+
+def parse_bulk_targets(message):
+    """Return (members, reason, failed) for a command like `اسكت @a @b السبب`"""
+    words = message.content.split()[1:]
+    reason = " ".join(word for word in words if not MENTION_PATTERN.fullmatch(word)) or "لا يوجد سبب محدد"
+    
+    members = []
+    failed = []
+    for member in message.mentions:
+        if member.id in (message.author.id, bot.user.id):
+            continue
+        if not isinstance(member, discord.Member):
+            failed.append((member, "ليس عضواً في السيرفر"))
+        elif len(members) >= BULK_TARGET_LIMIT:
+            failed.append((member, f"تجاوز الحد ({BULK_TARGET_LIMIT} عضو لكل أمر)"))
+        else:
+            members.append(member)
+    return members, reason, failed
+
+def bulk_failure_text(error):
+    """Short Arabic description of why an action failed for one member"""
+    if isinstance(error, discord.Forbidden):
+        return "البوت لا يملك صلاحيات كافية"
+    if isinstance(error, discord.NotFound):
+        return "العضو غير موجود"
+    return str(error)
+
+def mention_list(members, limit=None):
+    """Join member mentions, keeping the text within an embed description (or limit characters, cut on whole mentions)"""
+    text = "، ".join(member.mention for member in members)
+    if limit is None:
+        return text if len(text) <= 3500 else f"{len(members)} عضو"
+    if len(text) <= limit:
+        return text
+    shown = ""
+    for i, member in enumerate(members):
+        candidate = f"{shown}، {member.mention}" if shown else member.mention
+        if len(candidate) + len(f" +{len(members) - i - 1} آخرين") > limit:
+            break
+        shown = candidate
+    return f"{shown} +{len(members) - i} آخرين".lstrip()
+
+def add_bulk_failures(embed, failed):
+    """Add the members an action skipped or failed for to a confirmation embed"""
+    if not failed:
+        return
+    lines = [f"{member.mention}: {why}" for member, why in failed]
+    text = "\n".join(lines)
+    if len(text) > 1024:
+        text = "\n".join(lines[:10]) + f"\n... و {len(lines) - 10} آخرين"
+    embed.add_field(name=f"⚠️ لم يتم ({len(failed)})", value=text[:1024], inline=False)
+
+def bulk_failure_embed(title, failed):
+    """Embed for a command where no member could be acted on"""
+    embed = discord.Embed(title=title, color=discord.Color.red())
+    add_bulk_failures(embed, failed)
+    return embed
+
+def log_bulk_action(action, message, members, failed, reason):
+    """One moderation log record for a whole ban / kick command"""
+    moderation_logger.info("%s: %s by %s (%s), %d failed", action, ", ".join(str(member) for member in members),
+                           message.author, reason, len(failed),
+                           extra={'action': action, 'guild_id': message.guild.id, 'moderator_id': message.author.id,
+                                  'member_ids': [member.id for member in members],
+                                  'failed_ids': [member.id for member, _ in failed], 'reason': reason})
 
 async def handle_mute_command(message):
-    """Handle mute command directly"""
+    """Handle mute command directly (every mentioned member is muted)"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ ليس لديك صلاحيات كافية")
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
         return
     
     # Check if there are mentions
     if not message.mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `اسكت @عضو السبب`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `اسكت @عضو السبب`")
         return
     
     try:
-        member = message.mentions[0]
-        parts = message.content.split()
-        reason = " ".join(parts[2:]) if len(parts) > 2 else "لا يوجد سبب محدد"
-        
-        # Map reason to duration - نظام أسباب مختصر ومرن
-        reason_mapping = {
-            # أسباب قصيرة المدى (5-15 دقيقة)
-            "سب": 5, "شت": 5, "كلام": 5, "لفظ": 5, "استخدام": 5,
-            "تجاهل": 10, "تحذير": 10, "تنبيه": 10,
-            "كذب": 15, "دجل": 15, "خداع": 15,
-            
-            # أسباب متوسطة المدى (20-45 دقيقة)
-            "اساءة": 20, "اهانة": 20, "استهزاء": 20,
-            "سبام": 30, "تكرار": 30, "مزعج": 30,
-            "روابط": 45, "اعلان": 45, "دعاية": 45,
-            
-            # أسباب طويلة المدى (60-120 دقيقة)
-            "مخالفة": 60, "قاعدة": 60, "خطأ": 60,
-            "مشكلة": 90, "مخالفة خطيرة": 90,
-            "حظر مؤقت": 120, "مخالفة كبيرة": 120,
-            "نقاشات": 60, "سياسة": 60, "ديني": 60
-        }
-        
-        # تحديد المدة بناءً على أول كلمة في السبب
-        mute_duration = 15  # مدة افتراضية
-        matched_reason = "مخالفة عامة"
-        
-        # تقسيم السبب إلى كلمات والبحث عن أول كلمة مطابقة
-        reason_words = reason.lower().split()
-        
-        for word in reason_words:
-            for keyword, dur in reason_mapping.items():
-                if keyword in word or word in keyword:
-                    mute_duration = dur
-                    matched_reason = keyword
-                    break
-            if matched_reason != "مخالفة عامة":
-                break
+        members, reason, failed = parse_bulk_targets(message)
+        if not members and not failed:
+            await reply(message.channel, "❌ الاستخدام الصحيح: `اسكت @عضو السبب`")
+            return
+        
+        # Map reason to duration
+        matched_reason, mute_duration = match_mute_reason(reason)
         
         # إنشاء وصف المدة
         mute_description = f"⏱️ مدة الإسكات: {mute_duration} دقيقة\n🔹 السبب: {matched_reason}"
         
-        # Check if bot has permission to manage roles
-        if not message.guild.me.guild_permissions.manage_roles:
-            await message.channel.send("❌ البوت لا يملك صلاحية إدارة الرتب")
+        # Check if bot has permission to mute
+        if not bot_can_mute(message.guild):
+            await reply(message.channel, MUTE_PERMISSION_ERROR)
             return
         
-        # Check if bot can manage the target member's roles
-        if member.top_role >= message.guild.me.top_role:
-            await message.channel.send("❌ لا يمكن إسكات عضو برتبة أعلى من رتبة البوت")
-            return
+        targets = []
+        for member in members:
+            # Check if bot can manage the target member's roles
+            if member.top_role >= message.guild.me.top_role:
+                failed.append((member, "رتبته أعلى من رتبة البوت"))
+            else:
+                targets.append(member)
         
-        # Create muted role if it doesn't exist
-        try:
-            muted_role = discord.utils.get(message.guild.roles, name="Muted")
-            if not muted_role:
-                muted_role = await message.guild.create_role(name="Muted", color=discord.Color.dark_gray())
-                for channel in message.guild.channels:
-                    try:
-                        if isinstance(channel, discord.TextChannel):
-                            await channel.set_permissions(muted_role, send_messages=False, add_reactions=False)
-                    except discord.Forbidden:
-                        continue  # Skip channels where bot doesn't have permission
-        except discord.Forbidden:
-            await message.channel.send("❌ البوت لا يملك صلاحيات كافية لإنشاء دور الميوت")
-            return
-        except Exception as e:
-            await message.channel.send(f"❌ خطأ في إنشاء دور الميوت: {str(e)}")
+        if not targets:
+            await reply(message.channel, embed=bulk_failure_embed("❌ تعذر الإسكات", failed))
             return
         
-        try:
-            await member.add_roles(muted_role, reason=f"ميوت بواسطة {message.author} - السبب: {reason}")
-        except discord.Forbidden:
-            await message.channel.send("❌ البوت لا يملك صلاحيات كافية لإضافة الرتب")
-            return
-        except Exception as e:
-            await message.channel.send(f"❌ حدث خطأ أثناء الإسكات: {str(e)}")
+        # Create muted role if it doesn't exist (channel overwrites are applied in the background)
+        muted_role = None
+        if MUTE_BACKEND == 'role':
+            try:
+                muted_role = await ensure_muted_role(message.guild, message.channel)
+            except discord.Forbidden:
+                await reply(message.channel, "❌ البوت لا يملك صلاحيات كافية لإنشاء دور الميوت")
+                return
+            except Exception as e:
+                await reply(message.channel, f"❌ خطأ في إنشاء دور الميوت: {str(e)}")
+                return
+        
+        audit_reason = f"ميوت بواسطة {message.author} - السبب: {reason}"
+        results = await asyncio.gather(
+            *(apply_mute(message.guild, member, mute_duration, audit_reason, message.channel, muted_role)
+              for member in targets),
+            return_exceptions=True
+        )
+        muted = []
+        for member, result in zip(targets, results):
+            if isinstance(result, Exception):
+                failed.append((member, bulk_failure_text(result)))
+            else:
+                muted.append(member)
+        
+        if not muted:
+            await reply(message.channel, embed=bulk_failure_embed("❌ تعذر الإسكات", failed))
             return
         
         # Create embed with duration information
         embed = discord.Embed(
             title="🔇 تم الإسكات بنجاح",
-            description=f"تم إسكات {member.mention}",
+            description=f"تم إسكات {mention_list(muted)}",
             color=discord.Color.orange()
         )
         embed.add_field(name="السبب", value=reason, inline=True)
         embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
         embed.add_field(name="المدة", value=f"{mute_duration} دقيقة", inline=True)
         embed.add_field(name="التفاصيل", value=mute_description, inline=False)
+        add_bulk_failures(embed, failed)
         
-        await message.channel.send(embed=embed, delete_after=7)
-        
-        # Send report to mute-log channel
-        await send_mute_report(message.guild, member, reason, message.author, mute_duration, mute_description)
-        
-        # Schedule unmute after duration
-        if mute_duration > 0:
-            async def unmute_after_duration():
-                await asyncio.sleep(mute_duration * 60)  # Convert minutes to seconds
-                try:
-                    if muted_role in member.roles:
-                        await member.remove_roles(muted_role, reason="انتهت مدة الإسكات تلقائياً")
-                        
-                        # Send notification to mute-log channel
-                        try:
-                            mute_log_channel = discord.utils.get(message.guild.channels, name="mute-log")
-                            if mute_log_channel:
-                                unmute_embed = discord.Embed(
-                                    title="✅ تم إلغاء الإسكات تلقائياً",
-                                    description=f"تم إلغاء إسكات {member.mention} بعد انتهاء المدة",
-                                    color=discord.Color.green()
-                                )
-                                unmute_embed.add_field(name="المدة", value=f"{mute_duration} دقيقة", inline=True)
-                                unmute_embed.add_field(name="السبب", value=f"{matched_reason} ({reason})", inline=True)
-                                unmute_embed.add_field(name="التاريخ", value=datetime.datetime.now().strftime("%d-%B-%Y"), inline=True)
-                                await mute_log_channel.send(embed=unmute_embed)
-                            else:
-                                print("❌ روم mute-log غير موجود")
-                        except Exception as e:
-                            print(f"Error sending unmute notification: {e}")
-                        
-                        # Send unmute report to mute-log
-                        await send_unmute_report(message.guild, member, mute_duration)
-                except Exception as e:
-                    print(f"Error in auto-unmute: {e}")
-            
-            # Start the unmute task
-            asyncio.create_task(unmute_after_duration())
+        await reply(message.channel, embed=embed, delete_after=7)
+        
+        # Send one report to mute-log channel for the whole command
+        send_mute_report(message.guild, muted, reason, message.author, mute_duration, mute_description)
+        
+        # Record and schedule unmute after duration
+        for member in muted:
+            record_mute(message.guild, member, reason, matched_reason, mute_duration, message.author)
+            if mute_duration > 0:
+                mute_scheduler.schedule(message.guild.id, member.id, mute_duration, reason, matched_reason)
         
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
 
 async def handle_unmute_command(message):
     """Handle unmute command directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ ليس لديك صلاحيات كافية")
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
         return
     
     # Check if there are mentions
     if not message.mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `تكلم @عضو`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `تكلم @عضو`")
         return
     
     try:
         member = message.mentions[0]
-        muted_role = discord.utils.get(message.guild.roles, name="Muted")
         
-        if not muted_role or muted_role not in member.roles:
-            await message.channel.send("❌ هذا العضو غير مسكات")
+        if not is_member_muted(message.guild, member):
+            await reply(message.channel, "❌ هذا العضو غير مسكات")
             return
         
-        # Cancel any pending unmute task
-        task_key = f"{member.id}_{message.guild.id}"
-        if task_key in active_unmute_tasks:
-            try:
-                active_unmute_tasks[task_key].cancel()
-                del active_unmute_tasks[task_key]
-            except Exception as e:
-                print(f"Error canceling unmute task: {e}")
-        
-        await member.remove_roles(muted_role, reason=f"إلغاء إسكات بواسطة {message.author}")
+        await lift_mute(message.guild, member, f"إلغاء إسكات بواسطة {message.author}")
+        # Cancel the pending unmute only once the mute is lifted: if lifting failed it still expires on time
+        mute_scheduler.cancel(message.guild.id, member.id)
+        close_mute(message.guild, member)
         
         embed = discord.Embed(
             title="🔊 تم إلغاء الإسكات بنجاح",
@@ -1080,29 +1354,28 @@ async def handle_unmute_command(message):
         )
         embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
         
-        await message.channel.send(embed=embed, delete_after=7)
+        await reply(message.channel, embed=embed, delete_after=7)
         
         # Send manual unmute report to mute-log
-        await send_manual_unmute_report(message.guild, member, message.author)
+        send_manual_unmute_report(message.guild, member, message.author)
         
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
 
 async def handle_mute_list_command(message):
     """Handle mute list command directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ ليس لديك صلاحيات كافية")
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
         return
     
-    muted_role = discord.utils.get(message.guild.roles, name="Muted")
-    if not muted_role:
-        await message.channel.send("❌ لا توجد رتبة Muted")
+    if MUTE_BACKEND == 'role' and not get_role(message.guild, "Muted"):
+        await reply(message.channel, "❌ لا توجد رتبة Muted")
         return
     
-    muted_members = [member for member in message.guild.members if muted_role in member.roles]
+    muted_members = get_muted_members(message.guild)
     
     if not muted_members:
-        await message.channel.send("✅ لا يوجد أعضاء مسكات حالياً")
+        await reply(message.channel, "✅ لا يوجد أعضاء مسكات حالياً")
         return
     
     embed = discord.Embed(
@@ -1113,95 +1386,168 @@ async def handle_mute_list_command(message):
     member_list = "\n".join([f"• {member.mention}" for member in muted_members])
     embed.add_field(name="الأعضاء المسكات", value=member_list, inline=False)
     
-    await message.channel.send(embed=embed, delete_after=7)
+    await reply(message.channel, embed=embed, delete_after=7)
+
+async def handle_mute_status_command(message):
+    """Handle mute status command directly"""
+    if not is_owner_direct(message):
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
+        return
+    
+    member = message.mentions[0] if message.mentions else message.author
+    
+    if not is_member_muted(message.guild, member):
+        embed = discord.Embed(
+            title="🔊 حالة الإسكات",
+            description=f"{member.mention} غير مكتوم",
+            color=discord.Color.green()
+        )
+        await reply(message.channel, embed=embed, delete_after=7)
+        return
+    
+    # Get mute info
+    reason, muter, mute_time, remaining_time = await get_mute_info(message, member)
+    
+    embed = discord.Embed(
+        title="🔇 حالة الإسكات",
+        description=f"{member.mention} مكتوم",
+        color=discord.Color.red()
+    )
+    embed.add_field(name="السبب", value=reason, inline=True)
+    embed.add_field(name="بواسطة", value=muter.mention if muter else "غير معروف", inline=True)
+    embed.add_field(name="الوقت المتبقي", value=format_time_remaining(remaining_time), inline=True)
+    
+    await reply(message.channel, embed=embed, delete_after=7)
+
+async def ban_members(guild, users, audit_reason):
+    """Ban users, in one bulk-ban call when the library supports it; returns (banned, failed)"""
+    bulk_ban = getattr(guild, 'bulk_ban', None)  # discord.py 2.4+
+    if bulk_ban and len(users) > 1:
+        try:
+            result = await enforce(guild, bulk_ban, users, reason=audit_reason)
+        except discord.HTTPException as e:
+            return [], [(user, bulk_failure_text(e)) for user in users]
+        banned_ids = {user.id for user in result.banned}
+        banned = [user for user in users if user.id in banned_ids]
+        failed = [(user, "تعذر الحظر") for user in users if user.id not in banned_ids]
+        return banned, failed
+    
+    results = await asyncio.gather(
+        *(enforce(guild, guild.ban, user, reason=audit_reason) for user in users),
+        return_exceptions=True
+    )
+    banned = [user for user, result in zip(users, results) if not isinstance(result, Exception)]
+    failed = [(user, bulk_failure_text(result)) for user, result in zip(users, results) if isinstance(result, Exception)]
+    return banned, failed
 
 async def handle_ban_command(message):
-    """Handle ban command directly"""
+    """Handle ban command directly (every mentioned member is banned)"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ ليس لديك صلاحيات كافية")
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
         return
     
     # Check if there are mentions
     if not message.mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `باند @عضو السبب`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `باند @عضو السبب`")
         return
     
     try:
-        member = message.mentions[0]
-        parts = message.content.split()
-        reason = " ".join(parts[2:]) if len(parts) > 2 else "لا يوجد سبب محدد"
+        members, reason, failed = parse_bulk_targets(message)
+        if not members and not failed:
+            await reply(message.channel, "❌ الاستخدام الصحيح: `باند @عضو السبب`")
+            return
+        
+        banned, ban_failed = await ban_members(message.guild, members, f"حظر بواسطة {message.author} - السبب: {reason}")
+        failed += ban_failed
+        log_bulk_action('ban', message, banned, failed, reason)
         
-        await member.ban(reason=f"حظر بواسطة {message.author} - السبب: {reason}")
+        if not banned:
+            await reply(message.channel, embed=bulk_failure_embed("❌ تعذر الحظر", failed))
+            return
         
         embed = discord.Embed(
             title="🔨 تم الحظر بنجاح",
-            description=f"تم حظر {member.mention}",
+            description=f"تم حظر {mention_list(banned)}",
             color=discord.Color.dark_red()
         )
         embed.add_field(name="السبب", value=reason, inline=True)
         embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
+        add_bulk_failures(embed, failed)
         
-        await message.channel.send(embed=embed, delete_after=7)
+        await reply(message.channel, embed=embed, delete_after=7)
         
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
 
 async def handle_kick_command(message):
-    """Handle kick command directly"""
+    """Handle kick command directly (every mentioned member is kicked)"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ ليس لديك صلاحيات كافية")
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
         return
     
     # Check if there are mentions
     if not message.mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `كيك @عضو السبب`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `كيك @عضو السبب`")
         return
     
     try:
-        member = message.mentions[0]
-        parts = message.content.split()
-        reason = " ".join(parts[2:]) if len(parts) > 2 else "لا يوجد سبب محدد"
+        members, reason, failed = parse_bulk_targets(message)
+        if not members and not failed:
+            await reply(message.channel, "❌ الاستخدام الصحيح: `كيك @عضو السبب`")
+            return
         
-        await member.kick(reason=f"طرد بواسطة {message.author} - السبب: {reason}")
+        audit_reason = f"طرد بواسطة {message.author} - السبب: {reason}"
+        results = await asyncio.gather(
+            *(enforce(message.guild, member.kick, reason=audit_reason) for member in members),
+            return_exceptions=True
+        )
+        kicked = []
+        for member, result in zip(members, results):
+            if isinstance(result, Exception):
+                failed.append((member, bulk_failure_text(result)))
+            else:
+                kicked.append(member)
+        log_bulk_action('kick', message, kicked, failed, reason)
+        
+        if not kicked:
+            await reply(message.channel, embed=bulk_failure_embed("❌ تعذر الطرد", failed))
+            return
         
         embed = discord.Embed(
             title="👢 تم الطرد بنجاح",
-            description=f"تم طرد {member.mention}",
+            description=f"تم طرد {mention_list(kicked)}",
             color=discord.Color.red()
         )
         embed.add_field(name="السبب", value=reason, inline=True)
         embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
+        add_bulk_failures(embed, failed)
         
-        await message.channel.send(embed=embed, delete_after=7)
+        await reply(message.channel, embed=embed, delete_after=7)
         
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
 
 async def handle_clear_command(message):
     """Handle clear command directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ ليس لديك صلاحيات كافية")
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
         return
     
     parts = message.content.split()
     
     # Check if it's "مسح الكل" command
     if len(parts) > 1 and parts[1] == "الكل":
+        if len(parts) > 2:
+            # Not a purge with a typo: refuse rather than wipe the channel unconfirmed
+            await reply(message.channel, "❌ الأمر غير معروف - استخدم `مسح الكل` أو `مسح الكل تصفير`")
+            return
         try:
-            # Delete all messages in the channel
-            deleted = await message.channel.purge(limit=None)
-            
-            embed = discord.Embed(
-                title="🧹 تم حذف جميع الرسائل بنجاح",
-                description=f"تم حذف {len(deleted)} رسالة",
-                color=discord.Color.green()
-            )
-            
-            await message.channel.send(embed=embed, delete_after=5)
+            # Delete all messages in the channel in a background job (returns the job handle right away)
+            await start_purge_job(message.channel, message.author)
             return
             
         except Exception as e:
-            await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+            await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
             return
     
     # Regular clear command
@@ -1216,7 +1562,7 @@ async def handle_clear_command(message):
             amount = 5
     
     try:
-        deleted = await message.channel.purge(limit=amount + 1)  # +1 to include command message
+        deleted = await enforce(message.guild, message.channel.purge, limit=amount + 1)  # +1 to include command message
         
         embed = discord.Embed(
             title="🧹 تم الحذف بنجاح",
@@ -1224,34 +1570,168 @@ async def handle_clear_command(message):
             color=discord.Color.green()
         )
         
-        await message.channel.send(embed=embed, delete_after=5)
+        await reply(message.channel, embed=embed, delete_after=5)
         
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
+
+# Channel reset (مسح الكل تصفير) - نسخ الروم وحذف الأصلي بدل حذف الرسائل واحدة واحدة
+CHANNEL_RESET_CONFIRM_WORD = "تأكيد"
+CHANNEL_RESET_CONFIRM_TIMEOUT = 30  # seconds the server owner has to confirm
+
+def repost_pin_embed(pinned):
+    """Embed copy of a pinned message for the new channel"""
+    embed = discord.Embed(
+        description=pinned.content[:4096] or None,
+        color=discord.Color.greyple(),
+        timestamp=pinned.created_at
+    )
+    embed.set_author(name=pinned.author.display_name, icon_url=pinned.author.display_avatar.url)
+    images = [attachment for attachment in pinned.attachments if (attachment.content_type or "").startswith("image/")]
+    if images:
+        embed.set_image(url=images[0].url)
+    others = [attachment.url for attachment in pinned.attachments if attachment not in images[:1]]
+    if others:
+        embed.add_field(name="📎 المرفقات", value="\n".join(others)[:1024], inline=False)
+    embed.set_footer(text="📌 رسالة مثبتة من الروم السابق")
+    return embed
+
+async def reset_channel(channel, moderator):
+    """Replace a text channel with an empty clone; returns (new_channel, pins_reposted, webhooks_moved)"""
+    guild = channel.guild
+    audit_reason = f"تصفير الروم بواسطة {moderator}"
+    
+    # Collect what clone() doesn't copy before the original is gone
+    pins = await outbound.call(guild.id, REPLY, channel.pins)
+    try:
+        webhooks = await enforce(guild, channel.webhooks)
+    except discord.Forbidden:
+        webhooks = []  # needs Manage Webhooks
+    
+    # clone() copies name, category, overwrites, topic, nsfw and slowmode
+    new_channel = await enforce(guild, channel.clone, reason=audit_reason)
+    await enforce(guild, new_channel.edit, position=channel.position, reason=audit_reason)
+    
+    # Move webhooks so their URLs keep working
+    webhooks_moved = 0
+    for webhook in webhooks:
+        try:
+            await enforce(guild, webhook.edit, channel=new_channel, reason=audit_reason)
+            webhooks_moved += 1
+        except discord.HTTPException as e:
+            error_logger.warning("Error moving webhook %s: %s", webhook.name, e)
+    
+    # Keep the server's special channels pointing at the channel
+    guild_settings = {}
+    for setting in ('system_channel', 'rules_channel', 'public_updates_channel'):
+        if getattr(guild, setting) == channel:
+            guild_settings[setting] = new_channel
+    if guild_settings:
+        try:
+            await enforce(guild, guild.edit, reason=audit_reason, **guild_settings)
+        except discord.HTTPException as e:
+            error_logger.warning("Error updating guild channels after reset: %s", e)
+    
+    await enforce(guild, channel.delete, reason=audit_reason)
+    
+    # Repost pinned messages oldest first and pin the copies
+    pins_reposted = 0
+    for pinned in reversed(pins):
+        try:
+            repost = await reply(new_channel, embed=repost_pin_embed(pinned))
+            await outbound.call(guild.id, REPORT, repost.pin, reason=audit_reason)
+            pins_reposted += 1
+        except discord.HTTPException as e:
+            error_logger.warning("Error reposting pinned message %s: %s", pinned.id, e)
+    
+    moderation_logger.info("🧹 %s reset #%s", moderator, channel.name,
+                           extra={'action': 'channel_reset', 'guild_id': guild.id, 'moderator_id': moderator.id,
+                                  'channel_id': channel.id, 'new_channel_id': new_channel.id})
+    return new_channel, pins_reposted, webhooks_moved
+
+async def handle_channel_reset_command(message):
+    """Handle "مسح الكل تصفير": clone the channel and delete the original after the owner confirms"""
+    if not is_owner_direct(message):
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
+        return
+    if len(message.content.split()) > 3:
+        await reply(message.channel, "❌ الأمر `مسح الكل تصفير` لا يقبل أي إضافات")
+        return
+    
+    channel = message.channel
+    guild = message.guild
+    if not isinstance(channel, discord.TextChannel):
+        await reply(channel, "❌ التصفير متاح للرومات النصية فقط")
+        return
+    if not channel.permissions_for(guild.me).manage_channels:
+        await reply(channel, "❌ البوت لا يملك صلاحية إدارة الرومات")
+        return
+    
+    owner_text = "" if message.author.id == guild.owner_id else f" (من أونر السيرفر <@{guild.owner_id}>)"
+    await reply(
+        channel,
+        f"⚠️ سيتم حذف هذا الروم وإنشاء نسخة فارغة منه - كل الرسائل ستُحذف نهائياً.\n"
+        f"اكتب `{CHANNEL_RESET_CONFIRM_WORD}`{owner_text} خلال {CHANNEL_RESET_CONFIRM_TIMEOUT} ثانية للمتابعة.",
+        delete_after=CHANNEL_RESET_CONFIRM_TIMEOUT
+    )
+    
+    def is_confirmation(reply_message):
+        return (reply_message.channel.id == channel.id
+                and reply_message.author.id == guild.owner_id
+                and reply_message.content.strip() == CHANNEL_RESET_CONFIRM_WORD)
+    
+    try:
+        await bot.wait_for('message', check=is_confirmation, timeout=CHANNEL_RESET_CONFIRM_TIMEOUT)
+    except asyncio.TimeoutError:
+        await reply(channel, "❌ تم إلغاء التصفير - لم يتم التأكيد", delete_after=5)
+        return
+    
+    try:
+        new_channel, pins_reposted, webhooks_moved = await reset_channel(channel, message.author)
+    except discord.Forbidden:
+        await reply(channel, "❌ البوت لا يملك صلاحيات كافية لتصفير الروم")
+        return
+    except Exception as e:
+        await reply(channel, f"❌ حدث خطأ: {str(e)}")
+        return
+    
+    embed = discord.Embed(
+        title="🧹 تم تصفير الروم بنجاح",
+        description="تم حذف جميع الرسائل بإنشاء نسخة جديدة من الروم",
+        color=discord.Color.green()
+    )
+    embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
+    embed.add_field(name="الرسائل المثبتة", value=f"{pins_reposted} أعيد نشرها", inline=True)
+    embed.add_field(name="Webhooks", value=f"{webhooks_moved} تم نقلها", inline=True)
+    
+    try:
+        await reply(new_channel, embed=embed, delete_after=7)
+    except discord.HTTPException:
+        pass
 
 async def handle_add_role_command(message):
     """Handle add role command directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ هذا الأمر متاح لأونر السيرفر فقط")
+        await reply(message.channel, "❌ هذا الأمر متاح لأونر السيرفر فقط")
         return
     
     # Check if there are mentions
     if not message.mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `اضافة @عضو`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `اضافة @عضو`")
         return
     
     try:
         member = message.mentions[0]
-        owner_role = discord.utils.get(message.guild.roles, name="owner")
+        owner_role = get_role(message.guild, "owner")
         
         if not owner_role:
-            owner_role = await message.guild.create_role(name="owner", color=discord.Color.gold())
+            owner_role = await enforce(message.guild, message.guild.create_role, name="owner", color=discord.Color.gold())
         
         if owner_role in member.roles:
-            await message.channel.send("❌ هذا العضو يملك رتبة الأونر بالفعل")
+            await reply(message.channel, "❌ هذا العضو يملك رتبة الأونر بالفعل")
             return
         
-        await member.add_roles(owner_role, reason=f"إضافة رتبة الأونر بواسطة {message.author}")
+        await enforce(message.guild, member.add_roles, owner_role, reason=f"إضافة رتبة الأونر بواسطة {message.author}")
         
         embed = discord.Embed(
             title="✅ تم إضافة الرتبة بنجاح",
@@ -1261,31 +1741,31 @@ async def handle_add_role_command(message):
         embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
         embed.add_field(name="الرتبة", value=owner_role.mention, inline=True)
         
-        await message.channel.send(embed=embed)
+        await reply(message.channel, embed=embed)
         
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
 
 async def handle_remove_role_command(message):
     """Handle remove role command directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ هذا الأمر متاح لأونر السيرفر فقط")
+        await reply(message.channel, "❌ هذا الأمر متاح لأونر السيرفر فقط")
         return
     
     # Check if there are mentions
     if not message.mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `حذف @عضو`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `حذف @عضو`")
         return
     
     try:
         member = message.mentions[0]
-        owner_role = discord.utils.get(message.guild.roles, name="owner")
+        owner_role = get_role(message.guild, "owner")
         
         if not owner_role or owner_role not in member.roles:
-            await message.channel.send("❌ هذا العضو لا يملك رتبة الأونر")
+            await reply(message.channel, "❌ هذا العضو لا يملك رتبة الأونر")
             return
         
-        await member.remove_roles(owner_role, reason=f"إزالة رتبة الأونر بواسطة {message.author}")
+        await enforce(message.guild, member.remove_roles, owner_role, reason=f"إزالة رتبة الأونر بواسطة {message.author}")
         
         embed = discord.Embed(
             title="✅ تم إزالة الرتبة بنجاح",
@@ -1295,25 +1775,25 @@ async def handle_remove_role_command(message):
         embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
         embed.add_field(name="الرتبة", value=owner_role.mention, inline=True)
         
-        await message.channel.send(embed=embed)
+        await reply(message.channel, embed=embed)
         
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
 
 async def handle_add_custom_role_command(message):
     """Handle add custom role command directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ هذا الأمر متاح لأونر السيرفر فقط")
+        await reply(message.channel, "❌ هذا الأمر متاح لأونر السيرفر فقط")
         return
     
     # Check if there are mentions
     if not message.mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `اضافة رتبة @عضو @الرتبة`\nمثال: `اضافة رتبة @أحمد @VIP`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `اضافة رتبة @عضو @الرتبة`\nمثال: `اضافة رتبة @أحمد @VIP`")
         return
     
     # Check if there are role mentions
     if not message.role_mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `اضافة رتبة @عضو @الرتبة`\nمثال: `اضافة رتبة @أحمد @VIP`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `اضافة رتبة @عضو @الرتبة`\nمثال: `اضافة رتبة @أحمد @VIP`")
         return
     
     try:
@@ -1322,19 +1802,19 @@ async def handle_add_custom_role_command(message):
         
         # Check if bot has permissions to manage roles
         if not message.guild.me.guild_permissions.manage_roles:
-            await message.channel.send("❌ البوت لا يملك صلاحيات إدارة الرتب")
+            await reply(message.channel, "❌ البوت لا يملك صلاحيات إدارة الرتب")
             return
         
         # Check if the role is manageable by the bot
         if role.position >= message.guild.me.top_role.position:
-            await message.channel.send("❌ لا يمكن إضافة رتبة أعلى من رتبة البوت")
+            await reply(message.channel, "❌ لا يمكن إضافة رتبة أعلى من رتبة البوت")
             return
         
         if role in member.roles:
-            await message.channel.send("❌ هذا العضو يملك الرتبة بالفعل")
+            await reply(message.channel, "❌ هذا العضو يملك الرتبة بالفعل")
             return
         
-        await member.add_roles(role, reason=f"إضافة رتبة بواسطة {message.author}")
+        await enforce(message.guild, member.add_roles, role, reason=f"إضافة رتبة بواسطة {message.author}")
         
         embed = discord.Embed(
             title="✅ تم إضافة الرتبة بنجاح",
@@ -1344,27 +1824,27 @@ async def handle_add_custom_role_command(message):
         embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
         embed.add_field(name="الرتبة", value=role.mention, inline=True)
         
-        await message.channel.send(embed=embed)
+        await reply(message.channel, embed=embed)
         
     except discord.Forbidden:
-        await message.channel.send("❌ البوت لا يملك صلاحيات كافية لإضافة هذه الرتبة")
+        await reply(message.channel, "❌ البوت لا يملك صلاحيات كافية لإضافة هذه الرتبة")
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
 
 async def handle_remove_custom_role_command(message):
     """Handle remove custom role command directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ هذا الأمر متاح لأونر السيرفر فقط")
+        await reply(message.channel, "❌ هذا الأمر متاح لأونر السيرفر فقط")
         return
     
     # Check if there are mentions
     if not message.mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `حذف رتبة @عضو @الرتبة`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `حذف رتبة @عضو @الرتبة`")
         return
     
     # Check if there are role mentions
     if not message.role_mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `حذف رتبة @عضو @الرتبة`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `حذف رتبة @عضو @الرتبة`")
         return
     
     try:
@@ -1373,19 +1853,19 @@ async def handle_remove_custom_role_command(message):
         
         # Check if bot has permissions to manage roles
         if not message.guild.me.guild_permissions.manage_roles:
-            await message.channel.send("❌ البوت لا يملك صلاحيات إدارة الرتب")
+            await reply(message.channel, "❌ البوت لا يملك صلاحيات إدارة الرتب")
             return
         
         # Check if the role is manageable by the bot
         if role.position >= message.guild.me.top_role.position:
-            await message.channel.send("❌ لا يمكن إزالة رتبة أعلى من رتبة البوت")
+            await reply(message.channel, "❌ لا يمكن إزالة رتبة أعلى من رتبة البوت")
             return
         
         if role not in member.roles:
-            await message.channel.send("❌ هذا العضو لا يملك هذه الرتبة")
+            await reply(message.channel, "❌ هذا العضو لا يملك هذه الرتبة")
             return
         
-        await member.remove_roles(role, reason=f"إزالة رتبة بواسطة {message.author}")
+        await enforce(message.guild, member.remove_roles, role, reason=f"إزالة رتبة بواسطة {message.author}")
         
         embed = discord.Embed(
             title="✅ تم إزالة الرتبة بنجاح",
@@ -1395,17 +1875,17 @@ async def handle_remove_custom_role_command(message):
         embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
         embed.add_field(name="الرتبة", value=role.mention, inline=True)
         
-        await message.channel.send(embed=embed)
+        await reply(message.channel, embed=embed)
         
     except discord.Forbidden:
-        await message.channel.send("❌ البوت لا يملك صلاحيات كافية لإزالة هذه الرتبة")
+        await reply(message.channel, "❌ البوت لا يملك صلاحيات كافية لإزالة هذه الرتبة")
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
 
 async def handle_mute_reasons_command(message):
     """Handle mute reasons command directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ ليس لديك صلاحيات كافية")
+        await reply(message.channel, "❌ ليس لديك صلاحيات كافية")
         return
     
     embed = discord.Embed(
@@ -1457,17 +1937,17 @@ async def handle_mute_reasons_command(message):
     
     embed.set_footer(text="💡 اكتب أول كلمة من السبب فقط!")
     
-    await message.channel.send(embed=embed)
+    await reply(message.channel, embed=embed)
 
 async def handle_add_role_to_self_command(message):
     """Handle add role to self command directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ هذا الأمر متاح لأونر السيرفر فقط")
+        await reply(message.channel, "❌ هذا الأمر متاح لأونر السيرفر فقط")
         return
     
     # Check if there are role mentions
     if not message.role_mentions:
-        await message.channel.send("❌ الاستخدام الصحيح: `اضافة لي @الرتبة`\nمثال: `اضافة لي @VIP`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `اضافة لي @الرتبة`\nمثال: `اضافة لي @VIP`")
         return
     
     try:
@@ -1476,19 +1956,19 @@ async def handle_add_role_to_self_command(message):
         
         # Check if bot has permissions to manage roles
         if not message.guild.me.guild_permissions.manage_roles:
-            await message.channel.send("❌ البوت لا يملك صلاحيات إدارة الرتب")
+            await reply(message.channel, "❌ البوت لا يملك صلاحيات إدارة الرتب")
             return
         
         # Check if the role is manageable by the bot
         if role.position >= message.guild.me.top_role.position:
-            await message.channel.send("❌ لا يمكن إضافة رتبة أعلى من رتبة البوت")
+            await reply(message.channel, "❌ لا يمكن إضافة رتبة أعلى من رتبة البوت")
             return
         
         if role in member.roles:
-            await message.channel.send("❌ تملك هذه الرتبة بالفعل")
+            await reply(message.channel, "❌ تملك هذه الرتبة بالفعل")
             return
         
-        await member.add_roles(role, reason=f"إضافة رتبة لنفسه بواسطة {message.author}")
+        await enforce(message.guild, member.add_roles, role, reason=f"إضافة رتبة لنفسه بواسطة {message.author}")
         
         embed = discord.Embed(
             title="✅ تم إضافة الرتبة بنجاح",
@@ -1498,35 +1978,35 @@ async def handle_add_role_to_self_command(message):
         embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
         embed.add_field(name="الرتبة", value=role.mention, inline=True)
         
-        await message.channel.send(embed=embed)
+        await reply(message.channel, embed=embed)
         
     except discord.Forbidden:
-        await message.channel.send("❌ البوت لا يملك صلاحيات كافية لإضافة هذه الرتبة")
+        await reply(message.channel, "❌ البوت لا يملك صلاحيات كافية لإضافة هذه الرتبة")
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
 
 async def handle_create_admin_role_command(message):
     """Handle create admin role command directly"""
     if not is_owner_direct(message):
-        await message.channel.send("❌ هذا الأمر متاح لأونر السيرفر فقط")
+        await reply(message.channel, "❌ هذا الأمر متاح لأونر السيرفر فقط")
         return
     
     # Parse command: إنشاء رتبة اسم_الرتبة
     parts = message.content.split()
     if len(parts) < 3:
-        await message.channel.send("❌ الاستخدام الصحيح: `إنشاء رتبة اسم_الرتبة`\nمثال: `إنشاء رتبة مشرف`")
+        await reply(message.channel, "❌ الاستخدام الصحيح: `إنشاء رتبة اسم_الرتبة`\nمثال: `إنشاء رتبة مشرف`")
         return
     
     try:
         role_name = " ".join(parts[2:])  # Get the role name
-        existing_role = discord.utils.get(message.guild.roles, name=role_name)
+        existing_role = get_role(message.guild, role_name)
         
         if existing_role:
-            await message.channel.send(f"❌ الرتبة '{role_name}' موجودة بالفعل")
+            await reply(message.channel, f"❌ الرتبة '{role_name}' موجودة بالفعل")
             return
         
         # Create admin role with permissions
-        admin_role = await message.guild.create_role(
+        admin_role = await enforce(message.guild, message.guild.create_role,
             name=role_name,
             color=discord.Color.blue(),
             permissions=discord.Permissions(
@@ -1550,31 +2030,169 @@ async def handle_create_admin_role_command(message):
         embed.add_field(name="الصلاحيات", value="إدارية كاملة", inline=True)
         embed.add_field(name="بواسطة", value=message.author.mention, inline=True)
         
-        await message.channel.send(embed=embed)
+        await reply(message.channel, embed=embed)
         
     except Exception as e:
-        await message.channel.send(f"❌ حدث خطأ: {str(e)}")
+        await reply(message.channel, f"❌ حدث خطأ: {str(e)}")
 
-async def send_mute_report(guild, member, reason, admin, duration, description):
-    """Send mute report to mute-log channel"""
+async def auto_unmute(entry):
+    """Lift an expired mute and report it to mute-log; returns False if it failed and should be retried"""
     try:
-        # Find mute-log channel
-        mute_log_channel = discord.utils.get(guild.channels, name="mute-log")
-        
-        if not mute_log_channel:
-            print("❌ روم mute-log غير موجود")
+        guild = bot.get_guild(entry['guild_id'])
+        if not guild:
+            if CLUSTERED:
+                await rest_unmute(entry)  # the guild's shard runs in another process
+            return True  # otherwise the bot left the guild
+        
+        member = guild.get_member(entry['member_id'])
+        if not member:
+            try:
+                member = await guild.fetch_member(entry['member_id'])
+            except discord.NotFound:
+                return True
+        
+        if MUTE_BACKEND == 'timeout':
+            # Discord already lifted the timeout; only report it unless it was extended by hand
+            if member.is_timed_out():
+                return True
+        else:
+            if not is_member_muted(guild, member):
+                close_mute(guild, member)
+                return True
+            await lift_mute(guild, member, "انتهت مدة الإسكات تلقائياً")
+        close_mute(guild, member)
+        
+        reason = entry['matched_reason']
+        if entry['reason'] and entry['reason'] != reason:
+            reason = f"{reason} ({entry['reason']})"
+        send_unmute_report(guild, member, entry['duration'], reason)
+        return True
+    except Exception as e:
+        error_logger.error("Error in auto-unmute: %s", e)
+        return False
+
+async def rest_unmute(entry):
+    """Lift an expired mute over REST only, for a guild this process has no gateway state for (cluster leader)"""
+    guild_id, member_id = entry['guild_id'], entry['member_id']
+    role_id = store.get_guild_config(guild_id, 'muted_role_id') if MUTE_BACKEND == 'role' else None
+    if MUTE_BACKEND == 'role' and role_id is None:
+        error_logger.warning("No stored Muted role for guild %s, can't lift mute of %s", guild_id, member_id)
+        return
+    try:
+        data = await outbound.call(guild_id, ENFORCEMENT, bot.http.get_member, guild_id, member_id)
+    except discord.NotFound:
+        return  # left the guild
+    
+    if MUTE_BACKEND == 'timeout':
+        # Discord already lifted the timeout; only report it unless it was extended by hand
+        timed_out_until = discord.utils.parse_time(data.get('communication_disabled_until'))
+        if timed_out_until and timed_out_until > discord.utils.utcnow():
             return
-        
+    else:
+        if str(role_id) not in data['roles']:
+            store.close_mute(guild_id, member_id, time.time())  # unmuted by hand meanwhile
+            return
+        await outbound.call(guild_id, ENFORCEMENT, bot.http.remove_role, guild_id, member_id, role_id,
+                            reason="انتهت مدة الإسكات تلقائياً")
+    store.close_mute(guild_id, member_id, time.time())
+    
+    reason = entry['matched_reason']
+    if entry['reason'] and entry['reason'] != reason:
+        reason = f"{reason} ({entry['reason']})"
+    send_unmute_report(discord.Object(guild_id), discord.Object(member_id), entry['duration'], reason)
+
+# Per-guild config shared through the store (cluster mode): (guild id, key) -> value last written here
+guild_config_written = {}
+
+def share_guild_config(guild_id, key, value):
+    """Store a per-guild setting for the other cluster processes, only when it changed"""
+    if CLUSTERED and guild_config_written.get((guild_id, key)) != value:
+        store.set_guild_config(guild_id, key, value)
+        guild_config_written[(guild_id, key)] = value
+
+def remember_guild_config(guild):
+    """Share the ids a REST-only process needs to lift mutes and report them for this guild"""
+    if not CLUSTERED:
+        return
+    muted_role = get_role(guild, "Muted")
+    mute_log_channel = get_channel(guild, "mute-log")
+    share_guild_config(guild.id, 'muted_role_id', muted_role.id if muted_role else None)
+    share_guild_config(guild.id, 'mute_log_channel_id', mute_log_channel.id if mute_log_channel else None)
+
+# Mute-log reports
+# التقارير تُرسل في الخلفية عبر طابور لكل سيرفر - الدفعات الكبيرة تُدمج في رسالة واحدة
+# Optional: deliver through a webhook in mute-log so reports don't share the bot's message rate limit
+MUTE_LOG_WEBHOOK = os.getenv('MUTE_LOG_WEBHOOK', 'false').strip().lower() in ('1', 'true', 'yes')
+MUTE_LOG_WEBHOOK_NAME = "FSociety Mute Log"
+
+# guild id -> webhook in the current mute-log channel
+mute_log_webhooks = {}
+
+async def get_mute_log_webhook(channel):
+    """Return (creating it if needed) the bot's webhook in the mute-log channel"""
+    webhook = mute_log_webhooks.get(channel.guild.id)
+    if webhook and webhook.channel_id == channel.id:
+        return webhook
+    
+    webhook = None
+    for existing in await outbound.call(channel.guild.id, REPORT, channel.webhooks):
+        if existing.user and existing.user.id == bot.user.id and existing.token:
+            webhook = existing
+            break
+    if webhook is None:
+        webhook = await outbound.call(channel.guild.id, REPORT, channel.create_webhook, name=MUTE_LOG_WEBHOOK_NAME, reason="سجل الإسكات")
+    mute_log_webhooks[channel.guild.id] = webhook
+    return webhook
+
+async def deliver_mute_log(guild_id, embeds):
+    """ReportQueue callback: send one message of embeds to the guild's mute-log"""
+    guild = bot.get_guild(guild_id)
+    if not guild:
+        channel_id = store.get_guild_config(guild_id, 'mute_log_channel_id') if CLUSTERED else None
+        if channel_id:
+            # Report from the cluster leader for a guild run by another process
+            channel = bot.get_partial_messageable(channel_id, guild_id=guild_id)
+            await outbound.call(guild_id, REPORT, channel.send, embeds=embeds)
+        return
+    
+    remember_guild_config(guild)
+    mute_log_channel = get_channel(guild, "mute-log")
+    if not mute_log_channel:
+        error_logger.warning("❌ روم mute-log غير موجود")
+        return
+    
+    if MUTE_LOG_WEBHOOK:
+        try:
+            webhook = await get_mute_log_webhook(mute_log_channel)
+            try:
+                await outbound.call(guild_id, REPORT, webhook.send, embeds=embeds, username=MUTE_LOG_WEBHOOK_NAME)
+            except discord.NotFound:
+                # Webhook was deleted by hand: recreate it once
+                mute_log_webhooks.pop(guild_id, None)
+                webhook = await get_mute_log_webhook(mute_log_channel)
+                await outbound.call(guild_id, REPORT, webhook.send, embeds=embeds, username=MUTE_LOG_WEBHOOK_NAME)
+            return
+        except discord.Forbidden:
+            error_logger.warning("Missing Manage Webhooks in mute-log for %s, sending as the bot", guild)
+    
+    await outbound.call(guild_id, REPORT, mute_log_channel.send, embeds=embeds)
+
+report_queue = ReportQueue(deliver_mute_log)
+
+def format_duration(duration):
+    """Convert a duration in minutes to readable text"""
+    if duration >= 1440:  # 24 hours or more
+        return f"{duration // 1440} يوم"
+    elif duration >= 60:  # 1 hour or more
+        return f"{duration // 60} ساعة"
+    return f"{duration} دقيقة"
+
+def send_mute_report(guild, members, reason, admin, duration, description):
+    """Queue one mute report for the mute-log channel covering every member muted by a command"""
+    try:
         # Get current date in Arabic
         current_date = datetime.datetime.now().strftime("%d-%B-%Y")
-        
-        # Convert duration to readable format
-        if duration >= 1440:  # 24 hours or more
-            duration_text = f"{duration // 1440} يوم"
-        elif duration >= 60:  # 1 hour or more
-            duration_text = f"{duration // 60} ساعة"
-        else:
-            duration_text = f"{duration} دقيقة"
+        duration_text = format_duration(duration)
         
         # Create report embed
         report_embed = discord.Embed(
@@ -1582,7 +2200,7 @@ async def send_mute_report(guild, member, reason, admin, duration, description):
             color=discord.Color.red()
         )
         
-        report_embed.add_field(name="👤 المستخدم", value=member.mention, inline=True)
+        report_embed.add_field(name="👤 المستخدم", value=mention_list(members, limit=1024), inline=True)
         report_embed.add_field(name="⏱️ المدة", value=duration_text, inline=True)
         report_embed.add_field(name="📄 السبب", value=reason, inline=True)
         report_embed.add_field(name="📝 بواسطة", value=admin.mention, inline=True)
@@ -1592,31 +2210,22 @@ async def send_mute_report(guild, member, reason, admin, duration, description):
         if description:
             report_embed.add_field(name="📋 التفاصيل", value=description, inline=False)
         
-        await mute_log_channel.send(embed=report_embed)
+        report_queue.submit(
+            guild.id, 'mute', report_embed,
+            line=f"{mention_list(members) if len(members) <= 3 else f'{len(members)} عضو'} • {duration_text} • {reason} • {admin.mention}",
+            title="🛑 تقرير إسكات جماعي", color=discord.Color.red(),
+            key=('mute', tuple(member.id for member in members))
+        )
         
     except Exception as e:
-        print(f"Error sending mute report: {e}")
+        error_logger.error("Error sending mute report: %s", e)
 
-async def send_unmute_report(guild, member, duration):
-    """Send unmute report to mute-log channel"""
+def send_unmute_report(guild, member, duration, reason=None):
+    """Queue an automatic unmute report for the mute-log channel (guild and member only need ids)"""
     try:
-        # Find mute-log channel
-        mute_log_channel = discord.utils.get(guild.channels, name="mute-log")
-        
-        if not mute_log_channel:
-            print("❌ روم mute-log غير موجود")
-            return
-        
         # Get current date in Arabic
         current_date = datetime.datetime.now().strftime("%d-%B-%Y")
-        
-        # Convert duration to readable format
-        if duration >= 1440:  # 24 hours or more
-            duration_text = f"{duration // 1440} يوم"
-        elif duration >= 60:  # 1 hour or more
-            duration_text = f"{duration // 60} ساعة"
-        else:
-            duration_text = f"{duration} دقيقة"
+        duration_text = format_duration(duration)
         
         # Create unmute report embed
         unmute_embed = discord.Embed(
@@ -1625,26 +2234,26 @@ async def send_unmute_report(guild, member, duration):
             color=discord.Color.green()
         )
         
-        unmute_embed.add_field(name="👤 المستخدم", value=member.mention, inline=True)
+        unmute_embed.add_field(name="👤 المستخدم", value=f"<@{member.id}>", inline=True)
         unmute_embed.add_field(name="⏱️ المدة المكتملة", value=duration_text, inline=True)
+        if reason:
+            unmute_embed.add_field(name="📄 السبب", value=reason, inline=True)
         unmute_embed.add_field(name="📅 التاريخ", value=current_date, inline=True)
         unmute_embed.add_field(name="🔄 الحالة", value="تم الرفع تلقائياً", inline=True)
         
-        await mute_log_channel.send(embed=unmute_embed)
+        report_queue.submit(
+            guild.id, 'unmute', unmute_embed,
+            line=f"<@{member.id}> • {duration_text}" + (f" • {reason}" if reason else ""),
+            title="🔊 رفع الإسكات تلقائياً", color=discord.Color.green(),
+            key=('unmute', member.id)
+        )
         
     except Exception as e:
-        print(f"Error sending unmute report: {e}")
+        error_logger.error("Error sending unmute report: %s", e)
 
-async def send_manual_unmute_report(guild, member, admin):
-    """Send manual unmute report to mute-log channel"""
+def send_manual_unmute_report(guild, member, admin):
+    """Queue a manual unmute report for the mute-log channel"""
     try:
-        # Find mute-log channel
-        mute_log_channel = discord.utils.get(guild.channels, name="mute-log")
-        
-        if not mute_log_channel:
-            print("❌ روم mute-log غير موجود")
-            return
-        
         # Get current date in Arabic
         current_date = datetime.datetime.now().strftime("%d-%B-%Y")
         
@@ -1660,9 +2269,160 @@ async def send_manual_unmute_report(guild, member, admin):
         manual_unmute_embed.add_field(name="📅 التاريخ", value=current_date, inline=True)
         manual_unmute_embed.add_field(name="🔄 الحالة", value="تم الرفع يدوياً", inline=True)
         
-        await mute_log_channel.send(embed=manual_unmute_embed)
+        report_queue.submit(
+            guild.id, 'manual_unmute', manual_unmute_embed,
+            line=f"{member.mention} • {admin.mention}",
+            title="🔊 رفع الإسكات اليدوي", color=discord.Color.blue(),
+            key=('manual_unmute', member.id)
+        )
         
     except Exception as e:
-        print(f"Error sending manual unmute report: {e}")
+        error_logger.error("Error sending manual unmute report: %s", e)
+
+# Command routing
+# كل أمر مسجل مرة واحدة في شجرة كلمات مفتاحها الكلمة الأولى - أطول تطابق هو الذي يُنفذ
+command_routes = {}
+command_initials = set()
+max_route_depth = 1
+
+def register_command(phrase, handler, exact=False):
+    """Register a direct command handler; exact commands take no arguments"""
+    global max_route_depth
+    tokens = phrase.split()
+    node = command_routes.setdefault(tokens[0], {})
+    for token in tokens[1:]:
+        node = node.setdefault(token, {})
+    node[None] = (handler, exact)
+    command_initials.add(phrase[0])
+    max_route_depth = max(max_route_depth, len(tokens))
+
+def resolve_command(content):
+    """Return the handler of the longest command phrase at the start of content, or None"""
+    # Fast rejection for normal chat: one character lookup before any parsing
+    if not content:
+        return None
+    if content[0].isspace():
+        content = content.lstrip()
+        if not content:
+            return None
+    if content[0] not in command_initials:
+        return None
+    
+    tokens = content.split(None, max_route_depth)
+    node = command_routes.get(tokens[0])
+    if node is None:
+        return None
+    
+    handler = None
+    depth = 1
+    while True:
+        route = node.get(None)
+        if route is not None:
+            route_handler, exact = route
+            if not exact or depth == len(tokens):
+                handler = route_handler
+        if depth >= len(tokens) or depth >= max_route_depth:
+            break
+        node = node.get(tokens[depth])
+        if node is None:
+            break
+        depth += 1
+    
+    return handler
+
+register_command('مساعدة', help_command_direct, exact=True)
+register_command('حالة', status_command_direct, exact=True)
+register_command('اسكت', handle_mute_command)
+register_command('تكلم', handle_unmute_command)
+register_command('اسكات', handle_mute_list_command, exact=True)
+register_command('اسكاتي', handle_mute_status_command)
+register_command('اسباب', handle_mute_reasons_command, exact=True)
+register_command('باند', handle_ban_command)
+register_command('كيك', handle_kick_command)
+register_command('مسح', handle_clear_command)
+register_command('مسح الكل تصفير', handle_channel_reset_command)  # rejects extra words itself
+register_command('اضافة', handle_add_role_command)
+register_command('اضافة رتبة', handle_add_custom_role_command)
+register_command('اضافة لي', handle_add_role_to_self_command)
+register_command('حذف', handle_remove_role_command)
+register_command('حذف رتبة', handle_remove_custom_role_command)
+register_command('إنشاء رتبة', handle_create_admin_role_command)
+register_command('مهام', handle_jobs_command, exact=True)
+register_command('مهمة', handle_job_status_command)
+register_command('الغاء مهمة', handle_job_cancel_command)
+register_command('إلغاء مهمة', handle_job_cancel_command)
+
+async def drain_for_shutdown(timeout=SHUTDOWN_TIMEOUT):
+    """Run before the gateway closes on shutdown: finish in-flight work, leave the rest resumable
+
+    Unmute deadlines are already in the store (the scheduler only forgets a batch
+    once it has been handled) and jobs go back to queued with their checkpoint,
+    so whatever misses the deadline picks up again on the next start.
+    """
+    global accepting_commands
+    accepting_commands = False
+    health_monitor.draining = True
+    deadline = time.monotonic() + timeout
+    remaining = lambda: max(0.0, deadline - time.monotonic())
+    
+    await job_manager.suspend()
+    if commands_in_flight:
+        await asyncio.wait(set(commands_in_flight), timeout=remaining())
+    await report_queue.flush(timeout=remaining())
+    if not await outbound.drain(remaining()):
+        error_logger.warning("Shutdown deadline reached with %d requests still queued", outbound.pending())
+    await mute_scheduler.stop(timeout=max(1.0, remaining()))
+    if CLUSTERED:
+        await expiry_lease.release()  # another process takes the scheduler over right away
+    store.checkpoint()
+
+def status_snapshot():
+    """Live bot state for the HTTP /status endpoint"""
+    latency = bot.latency
+    return {
+        "status": "running",
+        "bot": "online" if bot.is_ready() and not bot.is_closed() else "offline",
+        "latency_ms": None if math.isnan(latency) else round(latency * 1000),
+        "guilds": len(bot.guilds),
+        "shards": {shard_id: {"latency_ms": None if shard['latency'] is None else round(shard['latency'] * 1000),
+                              "connected": shard['connected'],
+                              "events_per_second": round(shard['events_per_second'], 2)}
+                   for shard_id, shard in health_monitor.snapshot.get('shards', {}).items()},
+        "pending_unmutes": len(mute_scheduler),
+        "cluster": {"node": int(CLUSTER_NODE), "scheduler_leader": expiry_lease.held} if CLUSTERED else None,
+        "jobs": len(job_manager),
+        "outbound": {"in_flight": outbound.in_flight, "classes": outbound.snapshot()},
+        "timestamp": time.time()
+    }
+
+# Metric gauges, read at scrape time
+metrics.registry.gauge('fsociety_gateway_latency_seconds', 'Gateway heartbeat latency', lambda: bot.latency)
+metrics.registry.gauge('fsociety_gateway_down_seconds', 'Length of the longest current shard outage (0 while connected)',
+                       lambda: max((time.monotonic() - since for since in list(gateway_down_since.values())), default=0))
+metrics.registry.gauge('fsociety_shard_latency_seconds', 'Heartbeat latency per shard', lambda: {
+    shard_id: shard['latency'] for shard_id, shard in health_monitor.snapshot.get('shards', {}).items()
+}, labels=('shard',))
+metrics.registry.gauge('fsociety_shard_events_per_second', 'Gateway events per second per shard (last 10s)', lambda: {
+    shard_id: shard['events_per_second'] for shard_id, shard in health_monitor.snapshot.get('shards', {}).items()
+}, labels=('shard',))
+# Derived from the gateway sequence numbers the health monitor samples: a listener would add a task per event
+metrics.registry.gauge('fsociety_gateway_events_per_second', 'Gateway events per second (last 10s)', lambda: sum(
+    shard['events_per_second'] for shard in health_monitor.snapshot.get('shards', {}).values()))
+metrics.registry.gauge('fsociety_pending_unmutes', 'Scheduled unmute timers', lambda: len(mute_scheduler))
+metrics.registry.gauge('fsociety_guilds', 'Guilds the bot is in', lambda: len(bot.guilds))
+metrics.registry.gauge('fsociety_members', 'Members across all guilds', lambda: sum(guild.member_count or 0 for guild in bot.guilds))
+metrics.registry.gauge('fsociety_cached_users', 'Users in the client cache', lambda: len(bot.users))
+metrics.registry.gauge('fsociety_cache_entries', 'Entries in the bot caches', lambda: {
+    'role_names': sum(len(roles) for roles in list(role_name_cache.values())),
+    'channel_names': sum(len(channels) for channels in list(channel_name_cache.values())),
+    'admin_permissions': sum(len(members) for members in list(admin_permission_cache.values())),
+    'muted_index': sum(len(members) for members in list(muted_members_index.values())),
+    'mute_log_webhooks': len(mute_log_webhooks),
+}, labels=('cache',))
+metrics.registry.gauge('fsociety_outbound_pending', 'Queued outbound REST calls by class',
+                       lambda: {name: stats['pending'] for name, stats in outbound.snapshot().items()}, labels=('class',))
+metrics.registry.gauge('fsociety_outbound_in_flight', 'Outbound REST calls in flight', lambda: outbound.in_flight)
+metrics.registry.gauge('fsociety_report_queue_pending', 'Mute-log reports waiting to be sent', lambda: len(report_queue))
+metrics.registry.gauge('fsociety_jobs_active', 'Queued or running background jobs', lambda: len(job_manager))
 
-# Note: bot.run() is handled in app.py to avoid conflicts 
\ No newline at end of file
+# Note: bot.run() is handled in app.py to avoid conflicts
\ No newline at end of file
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics for FSociety Discord Bot
+"""
+
+import math
+import re
+from bot_logging import get_logger
+
+error_logger = get_logger('errors')
+
+# Metrics are only updated from the bot's event loop thread. Updates are plain
+# dict / int operations (no locks); the HTTP thread reads copies taken with
+# list(), which is atomic under the GIL, so a scrape never blocks the loop.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}  # label values -> count
+
+    def inc(self, value=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self):
+        for key, value in list(self._values.items()):
+            yield self.name, _format_labels(self.labels, key), value
+
+class Gauge:
+    """Value read from a callback at scrape time; the callback returns a number or {label values: number}"""
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, callback, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labels = tuple(labels)
+
+    def samples(self):
+        value = self.callback()
+        if isinstance(value, dict):
+            for key, item in list(value.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                yield self.name, _format_labels(self.labels, key), item
+        else:
+            yield self.name, "", value
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def samples(self):
+        for key, series in list(self._series.items()):
+            series = list(series)
+            for bound, count in zip(self.buckets, series):
+                yield f"{self.name}_bucket", _format_labels(self.labels, key, ('le', _format_value(float(bound)))), count
+            yield f"{self.name}_bucket", _format_labels(self.labels, key, ('le', '+Inf')), series[-2]
+            yield f"{self.name}_count", _format_labels(self.labels, key), series[-2]
+            yield f"{self.name}_sum", _format_labels(self.labels, key), series[-1]
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, callback, labels=()):
+        return self.register(Gauge(name, documentation, callback, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                # A gauge callback raced a mutation on the loop; skip it for this scrape
+                error_logger.debug("Error collecting metric %s: %s", metric.name, e)
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# REST 429s, counted from discord.py's rate limit warnings (discord.http)
+_SNOWFLAKE = re.compile(r'/\d{15,}')
+_API_BASE = re.compile(r'^https?://[^/]+/api/v\d+')
+
+class RateLimitCounter:
+    """Logging filter that counts "We are being rate limited" records by route"""
+
+    def __init__(self, counter):
+        self.counter = counter
+
+    def filter(self, record):
+        if isinstance(record.msg, str) and record.msg.startswith('We are being rate limited') and len(record.args) >= 2:
+            method, url = record.args[0], str(record.args[1])
+            route = _SNOWFLAKE.sub('/{id}', _API_BASE.sub('', url))
+            self.counter.inc(bucket=f"{method} {route}")
+        return True
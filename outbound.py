@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Outbound REST Scheduler for FSociety Discord Bot
+"""
+
+import asyncio
+import collections
+import time
+import discord
+from bot_logging import get_logger
+
+error_logger = get_logger('errors')
+
+# Priority classes, most urgent first
+ENFORCEMENT = 0  # mute, ban, kick, purge, role changes
+REPLY = 1        # confirmations and errors sent back to the moderator
+REPORT = 2       # mute-log reports
+CLEANUP = 3      # deleting expired confirmations
+BACKGROUND = 4   # bulk fan-out (Muted role channel overwrites) and its progress messages
+
+PRIORITY_NAMES = {ENFORCEMENT: 'enforcement', REPLY: 'reply', REPORT: 'report', CLEANUP: 'cleanup',
+                  BACKGROUND: 'background'}
+
+class OutboundScheduler:
+    """Run REST calls through a fixed number of slots, most urgent class first, round-robin across guilds
+
+    Only wrap leaf REST calls: a queued call that itself waits on the scheduler can hold a slot forever.
+    """
+
+    def __init__(self, concurrency=8):
+        self.concurrency = concurrency
+        # Lower classes may only fill part of the slots so enforcement never waits for a free one:
+        # calls stuck in a 429 sleep keep holding theirs, so even replies leave a quarter free
+        reserved = max(1, concurrency // 4)
+        self.limits = {
+            ENFORCEMENT: concurrency,
+            REPLY: max(1, concurrency - reserved),
+            REPORT: max(1, min(concurrency - reserved, concurrency * 3 // 4)),
+            CLEANUP: max(1, concurrency // 2),
+            BACKGROUND: max(1, concurrency // 2),
+        }
+        self._queues = {priority: {} for priority in PRIORITY_NAMES}  # priority -> {guild id: deque}
+        self._rotation = {priority: collections.deque() for priority in PRIORITY_NAMES}  # guilds with queued calls
+        self._background = set()
+        self.in_flight = 0
+        self.stats = {
+            priority: {'submitted': 0, 'completed': 0, 'failed': 0, 'wait_total': 0.0, 'wait_max': 0.0}
+            for priority in PRIORITY_NAMES
+        }
+
+    def pending(self, priority=None):
+        """Number of queued calls (of one class, or all)"""
+        priorities = PRIORITY_NAMES if priority is None else (priority,)
+        # list() copies in one step so the Flask thread can read this while the loop mutates it
+        return sum(len(queue) for p in priorities for queue in list(self._queues[p].values()))
+
+    def snapshot(self):
+        """Per-class counters and queue depths, for status and metrics"""
+        return {
+            PRIORITY_NAMES[priority]: dict(stats, pending=self.pending(priority))
+            for priority, stats in self.stats.items()
+        }
+
+    async def call(self, guild_id, priority, func, /, *args, **kwargs):
+        """Queue func(*args, **kwargs) and return its result once it has run"""
+        future = asyncio.get_running_loop().create_future()
+        guild_queue = self._queues[priority].get(guild_id)
+        if guild_queue is None:
+            guild_queue = self._queues[priority][guild_id] = collections.deque()
+            self._rotation[priority].append(guild_id)
+        guild_queue.append((func, args, kwargs, future, time.monotonic()))
+        self.stats[priority]['submitted'] += 1
+        self._dispatch()
+        return await future
+
+    async def drain(self, timeout):
+        """Wait until nothing is queued or running, up to timeout seconds; returns True if drained"""
+        deadline = time.monotonic() + timeout
+        while self.in_flight or self.pending():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def submit(self, guild_id, priority, func, /, *args, delay=0, **kwargs):
+        """Fire-and-forget call (optionally after delay seconds); failures are logged"""
+        async def run():
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                await self.call(guild_id, priority, func, *args, **kwargs)
+            except discord.NotFound:
+                pass  # already gone (e.g. a confirmation deleted by hand)
+            except Exception as e:
+                error_logger.warning("Error in background %s request: %s", PRIORITY_NAMES[priority], e)
+
+        task = asyncio.create_task(run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def _next(self):
+        """Pop the next runnable call: highest class with a free slot, next guild in rotation"""
+        for priority in PRIORITY_NAMES:
+            rotation = self._rotation[priority]
+            if not rotation or self.in_flight >= self.limits[priority]:
+                continue
+            guild_id = rotation.popleft()
+            guild_queue = self._queues[priority][guild_id]
+            request = guild_queue.popleft()
+            if guild_queue:
+                rotation.append(guild_id)
+            else:
+                del self._queues[priority][guild_id]
+            return priority, request
+        return None
+
+    def _dispatch(self):
+        while self.in_flight < self.concurrency:
+            item = self._next()
+            if item is None:
+                return
+            priority, (func, args, kwargs, future, queued_at) = item
+            if future.cancelled():
+                continue  # caller gave up while queued
+
+            wait = time.monotonic() - queued_at
+            stats = self.stats[priority]
+            stats['wait_total'] += wait
+            stats['wait_max'] = max(stats['wait_max'], wait)
+
+            self.in_flight += 1
+            task = asyncio.create_task(self._execute(priority, func, args, kwargs, future))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _execute(self, priority, func, args, kwargs, future):
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats[priority]['failed'] += 1
+            if not future.done():
+                future.set_exception(e)
+        else:
+            self.stats[priority]['completed'] += 1
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
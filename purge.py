@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Streaming Channel Purge for FSociety Discord Bot
+"""
+
+import asyncio
+import collections
+import datetime
+import discord
+from outbound import ENFORCEMENT, CLEANUP
+from bot_logging import get_logger
+
+error_logger = get_logger('errors')
+
+# Discord only bulk-deletes messages younger than 14 days (kept a minute short of the limit)
+BULK_DELETE_MAX_AGE = datetime.timedelta(days=14, minutes=-1)
+BULK_DELETE_MAX = 100
+
+class StreamingPurge:
+    """Delete a channel's history one window at a time
+
+    Messages younger than 14 days are bulk-deleted 100 at a time. Older messages
+    can only be deleted one by one, so they go to a throttled lane in the cleanup
+    class. Only the current window (plus the ids queued for the old lane) is held
+    in memory.
+    """
+
+    def __init__(self, channel, outbound, check=None, window=BULK_DELETE_MAX, old_delay=1.0, progress=None):
+        self.channel = channel
+        self.outbound = outbound
+        self.check = check  # optional filter: only matching messages are deleted
+        self.window = window
+        self.old_delay = old_delay  # seconds between single deletes of old messages
+        self.progress = progress  # async callback (purge) called after each window and old delete
+        self.scanned = 0
+        self.deleted = 0
+        self.failed = 0
+        self.cursor = None  # id of the oldest message walked so far (history continues before it)
+        self.done = False
+        self._old_pending = collections.deque()  # ids queued on the old lane, newest first
+
+    @property
+    def resume_cursor(self):
+        """History position to restart from: nothing newer than it is left undeleted"""
+        if self._old_pending:
+            return self._old_pending[0] + 1
+        return self.cursor
+
+    async def run(self, before=None):
+        """Walk the history before `before` (a message or id) and delete it; returns the number deleted"""
+        if before is not None:
+            self.cursor = getattr(before, 'id', before)
+        old_lane = asyncio.Queue(maxsize=self.window)
+        old_task = asyncio.create_task(self._old_lane(old_lane))
+        try:
+            while True:
+                window = []
+                history_before = discord.Object(self.cursor) if self.cursor else None
+                async for message in self.channel.history(limit=self.window, before=history_before):
+                    window.append(message)
+                if not window:
+                    break
+                self.scanned += len(window)
+                oldest = window[-1].id
+
+                cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+                young = []
+                for message in window:
+                    if self.check and not self.check(message):
+                        continue
+                    if message.created_at > cutoff:
+                        young.append(message)
+                    else:
+                        self._old_pending.append(message.id)
+                        await old_lane.put(message.id)  # waits while the old lane is a window behind
+                del window
+
+                await self._bulk_delete(young)
+                self.cursor = oldest
+                if self.progress:
+                    await self.progress(self)
+            await old_lane.join()
+            self.done = True
+        finally:
+            old_task.cancel()
+        if self.progress:
+            await self.progress(self)
+        return self.deleted
+
+    async def _bulk_delete(self, messages):
+        guild_id = self.channel.guild.id
+        for i in range(0, len(messages), BULK_DELETE_MAX):
+            batch = messages[i:i + BULK_DELETE_MAX]
+            try:
+                if len(batch) == 1:
+                    await self.outbound.call(guild_id, ENFORCEMENT, batch[0].delete)
+                else:
+                    await self.outbound.call(guild_id, ENFORCEMENT, self.channel.delete_messages, batch)
+                self.deleted += len(batch)
+            except discord.NotFound:
+                pass  # already deleted
+            except discord.HTTPException as e:
+                self.failed += len(batch)
+                error_logger.warning("Error bulk deleting in %s: %s", self.channel, e)
+
+    async def _old_lane(self, queue):
+        guild_id = self.channel.guild.id
+        while True:
+            message_id = await queue.get()
+            try:
+                await self.outbound.call(guild_id, CLEANUP, self.channel.get_partial_message(message_id).delete)
+                self.deleted += 1
+            except discord.NotFound:
+                pass
+            except Exception as e:
+                self.failed += 1
+                error_logger.warning("Error deleting old message in %s: %s", self.channel, e)
+            finally:
+                self._old_pending.popleft()
+                queue.task_done()
+            if self.progress:
+                await self.progress(self)
+            await asyncio.sleep(self.old_delay)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Mute-Log Report Queue for FSociety Discord Bot
+"""
+
+import asyncio
+import discord
+from bot_logging import get_logger
+
+error_logger = get_logger('errors')
+
+# Discord limits for a single message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+class ReportQueue:
+    """Per-guild mute-log queue: reports are sent off the command path and bursts are merged"""
+
+    def __init__(self, deliver, window=2.0, coalesce_threshold=3, lines_per_page=10):
+        self.deliver = deliver  # async callback (guild_id, embeds) sending one message
+        self.window = window  # seconds to wait for a burst to accumulate
+        self.coalesce_threshold = coalesce_threshold  # same-kind reports merged from this count
+        self.lines_per_page = lines_per_page
+        self._pending = {}  # guild id -> list of reports
+        self._workers = {}  # guild id -> drain task
+
+    def __len__(self):
+        return sum(len(reports) for reports in list(self._pending.values()))
+
+    def submit(self, guild_id, kind, embed, line, title, color, key=None):
+        """Queue a report; a report with the same key already waiting in the burst is replaced"""
+        reports = self._pending.setdefault(guild_id, [])
+        report = {'kind': kind, 'embed': embed, 'line': line, 'title': title, 'color': color, 'key': key}
+        if key is not None:
+            reports[:] = [queued for queued in reports if queued['key'] != key]
+        reports.append(report)
+
+        worker = self._workers.get(guild_id)
+        if worker is None or worker.done():
+            self._workers[guild_id] = asyncio.create_task(self._drain(guild_id))
+
+    async def flush(self, timeout=None):
+        """Wait for every queued report to be delivered"""
+        workers = [worker for worker in self._workers.values() if not worker.done()]
+        if workers:
+            await asyncio.wait(workers, timeout=timeout)
+
+    async def _drain(self, guild_id):
+        await asyncio.sleep(self.window)
+        while self._pending.get(guild_id):
+            reports = self._pending.pop(guild_id)
+            for embeds in self._build_messages(reports):
+                try:
+                    await self.deliver(guild_id, embeds)
+                except Exception as e:
+                    error_logger.error("Error delivering mute-log report: %s", e)
+
+    def _build_messages(self, reports):
+        """Turn a burst of reports into lists of embeds, one list per message"""
+        embeds = []
+        by_kind = {}
+        for report in reports:
+            by_kind.setdefault(report['kind'], []).append(report)
+
+        for kind_reports in by_kind.values():
+            if len(kind_reports) < self.coalesce_threshold:
+                embeds.extend(report['embed'] for report in kind_reports)
+                continue
+
+            # One paginated summary instead of one message per report
+            first = kind_reports[0]
+            pages = [kind_reports[i:i + self.lines_per_page]
+                     for i in range(0, len(kind_reports), self.lines_per_page)]
+            for number, page in enumerate(pages, 1):
+                summary = discord.Embed(
+                    title=f"{first['title']} ({len(kind_reports)})",
+                    description="\n".join(report['line'] for report in page),
+                    color=first['color']
+                )
+                if len(pages) > 1:
+                    summary.set_footer(text=f"صفحة {number}/{len(pages)}")
+                embeds.append(summary)
+
+        # Pack embeds into as few messages as Discord allows
+        messages = []
+        current = []
+        size = 0
+        for embed in embeds:
+            if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or size + len(embed) > MAX_EMBED_CHARS_PER_MESSAGE):
+                messages.append(current)
+                current = []
+                size = 0
+            current.append(embed)
+            size += len(embed)
+        if current:
+            messages.append(current)
+        return messages
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Mute Expiry Scheduler for FSociety Discord Bot
+"""
+
+import asyncio
+import heapq
+import time
+from bot_logging import get_logger
+
+error_logger = get_logger('errors')
+
+# Failed unmutes are retried after RETRY_BASE, doubling up to RETRY_MAX seconds
+RETRY_BASE = 30
+RETRY_MAX = 3600
+
+class MuteScheduler:
+    """Run every pending unmute from a single task (min-heap of deadlines)"""
+
+    def __init__(self, store, on_expire, batch_size=50, owns=None):
+        self.store = store
+        self.on_expire = on_expire  # async callback receiving due entries, returning the ones that failed
+        self.batch_size = batch_size
+        self.owns = owns  # optional guild id filter: other processes' unmutes are left in the store
+        self._heap = []  # (expires_at, key) - stale items are skipped lazily
+        self._entries = {}  # key -> entry
+        self._pushed_at = {}  # key -> when the entry was (re)queued here, for the backlog lag
+        self._started_at = None
+        self._wakeup = None  # created by start() on the loop that runs the scheduler
+        self._task = None
+        self._stopping = False
+        self._loaded = False
+        self._processing = set()  # keys of the batch being handled (gone from _entries, still in the store)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self):
+        """Load pending unmutes from the store (safe to call more than once)"""
+        if self._loaded:
+            return
+        for entry in self.store.load_expiries():
+            if self.owns is None or self.owns(entry['guild_id']):
+                self._push(entry)
+        self._loaded = True
+
+    def sync(self):
+        """Reload pending unmutes from the store, picking up changes made by other processes"""
+        stored = {(entry['guild_id'], entry['member_id']): entry for entry in self.store.load_expiries()
+                  if self.owns is None or self.owns(entry['guild_id'])}
+        for key in [key for key in self._entries if key not in stored]:
+            del self._entries[key]  # cancelled elsewhere; its heap item is skipped as stale
+            self._pushed_at.pop(key, None)
+        for key, entry in stored.items():
+            current = self._entries.get(key)
+            if key not in self._processing and (current is None or current['expires_at'] != entry['expires_at']):
+                self._push(entry)
+        self._loaded = True
+
+    def start(self):
+        """Start the scheduler task if it isn't running"""
+        self.load()
+        if self._task is None or self._task.done():
+            # Created here, not in __init__: on Python < 3.10 an Event is bound to the loop current at creation
+            self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._started_at = time.time()
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self, timeout=None):
+        """Stop the scheduler task, waiting up to timeout seconds for it (pending entries stay in the store)"""
+        task = self._task
+        if task and not task.done():
+            # The flag ends the loop even if the cancellation lands while the task is between awaits
+            self._stopping = True
+            self._wakeup.set()
+            task.cancel()
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if not done:
+                error_logger.warning("Mute scheduler did not stop within %ss", timeout)
+        self._task = None
+        self._processing = set()  # an interrupted batch is still in the store
+
+    def backlog(self, now):
+        """Return (number of overdue unmutes, seconds the most overdue one has waited since it became runnable)
+
+        An unmute that expired while the bot was down (or was reconciled late) only counts from
+        when this scheduler could run it, so a restart doesn't read as a stuck scheduler.
+        """
+        started_at = self._started_at if self._started_at is not None else now
+        overdue = [now - max(entry['expires_at'], self._pushed_at.get(key, now), started_at)
+                   for key, entry in list(self._entries.items()) if entry['expires_at'] <= now]
+        return len(overdue), max(overdue, default=0.0)
+
+    def get(self, guild_id, member_id):
+        """Return the pending entry for a member, or None"""
+        return self._entries.get((guild_id, member_id))
+
+    def schedule(self, guild_id, member_id, duration, reason=None, matched_reason=None, expires_at=None):
+        """Schedule (or replace) an unmute after duration minutes, or at expires_at (a past deadline runs at once)"""
+        entry = {
+            'guild_id': guild_id,
+            'member_id': member_id,
+            'expires_at': time.time() + duration * 60 if expires_at is None else expires_at,
+            'duration': duration,
+            'reason': reason,
+            'matched_reason': matched_reason,
+        }
+        self.store.save_expiry(entry)
+        self._push(entry)
+        return entry
+
+    def cancel(self, guild_id, member_id):
+        """Cancel a pending unmute; returns True if one existed"""
+        key = (guild_id, member_id)
+        entry = self._entries.pop(key, None)
+        self._pushed_at.pop(key, None)
+        self.store.delete_expiries([key])
+        return entry is not None
+
+    def extend(self, guild_id, member_id, minutes):
+        """Push a pending unmute back by minutes; returns the updated entry or None"""
+        entry = self._entries.get((guild_id, member_id))
+        if entry is None:
+            return None
+        entry = dict(entry, expires_at=entry['expires_at'] + minutes * 60, duration=entry['duration'] + minutes)
+        self.store.save_expiry(entry)
+        self._push(entry)
+        return entry
+
+    def _push(self, entry):
+        key = (entry['guild_id'], entry['member_id'])
+        self._entries[key] = entry
+        self._pushed_at[key] = time.time()
+        heapq.heappush(self._heap, (entry['expires_at'], key))
+
+        # Drop stale heap items once they outnumber live entries
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(e['expires_at'], k) for k, e in self._entries.items()]
+            heapq.heapify(self._heap)
+
+        # Wake the loop if this deadline is now the earliest one
+        if self._wakeup is not None and self._heap[0][1] == key:
+            self._wakeup.set()
+
+    def _retry(self, entries):
+        """Push failed unmutes back with a backoff deadline (kept in the store across restarts)"""
+        now = time.time()
+        for entry in entries:
+            key = (entry['guild_id'], entry['member_id'])
+            if key in self._entries:
+                continue  # re-muted while the batch ran: the new deadline wins
+            attempts = entry.get('attempts', 0) + 1
+            expires_at = now + min(RETRY_MAX, RETRY_BASE * 2 ** (attempts - 1))
+            if self.store.retry_expiry(entry, expires_at):
+                error_logger.warning("Unmute of %s in guild %s failed, retrying in %ds",
+                                     entry['member_id'], entry['guild_id'], expires_at - now)
+                self._push(dict(entry, expires_at=expires_at, attempts=attempts))
+
+    def _pop_due(self, now):
+        """Pop up to batch_size entries whose deadline has passed"""
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            expires_at, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry['expires_at'] != expires_at:
+                continue  # cancelled or rescheduled
+            del self._entries[key]
+            self._pushed_at.pop(key, None)
+            due.append(entry)
+        return due
+
+    async def _run(self):
+        while not self._stopping:
+            due = self._pop_due(time.time())
+            if due:
+                self._processing = {(e['guild_id'], e['member_id']) for e in due}
+                try:
+                    failed = await self.on_expire(due) or []
+                except Exception as e:
+                    error_logger.error("Error processing expired mutes: %s", e)
+                    failed = due
+                # Only forget what was handled (skip members re-muted meanwhile); failures are retried
+                failed_keys = {(e['guild_id'], e['member_id']) for e in failed}
+                self.store.delete_handled_expiries(
+                    [e for e in due if (e['guild_id'], e['member_id']) not in failed_keys])
+                self._retry(failed)
+                self._processing = set()
+                continue
+
+            timeout = 300
+            if self._heap:
+                timeout = min(timeout, max(0, self._heap[0][0] - time.time()))
+            self._wakeup.clear()
+            # asyncio.wait, not wait_for: before 3.12 wait_for can swallow a cancellation
+            # that arrives in the same tick as the wakeup, and stop() would never return
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=timeout)
+            finally:
+                waiter.cancel()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Local SQLite Store for FSociety Discord Bot
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+# Default database location (override with DATABASE_PATH)
+DATABASE_PATH = os.getenv('DATABASE_PATH', os.path.join('data', 'fsociety.db'))
+
+class BotStore:
+    """Small SQLite (WAL) store shared by the bot's persistent subsystems"""
+
+    def __init__(self, path=DATABASE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create tables and indexes if they don't exist"""
+        with self._lock:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS scheduled_unmutes (
+                    guild_id INTEGER NOT NULL,
+                    member_id INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    duration INTEGER NOT NULL,
+                    reason TEXT,
+                    matched_reason TEXT,
+                    PRIMARY KEY (guild_id, member_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_scheduled_unmutes_expires
+                    ON scheduled_unmutes (expires_at);
+
+                CREATE TABLE IF NOT EXISTS mute_ledger (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guild_id INTEGER NOT NULL,
+                    member_id INTEGER NOT NULL,
+                    reason TEXT,
+                    matched_reason TEXT,
+                    duration INTEGER NOT NULL,
+                    issued_at REAL NOT NULL,
+                    moderator_id INTEGER,
+                    lifted_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_mute_ledger_member
+                    ON mute_ledger (guild_id, member_id, issued_at DESC);
+
+                CREATE TABLE IF NOT EXISTS audit_events (
+                    entry_id INTEGER PRIMARY KEY,
+                    guild_id INTEGER NOT NULL,
+                    action TEXT NOT NULL,
+                    target_id INTEGER,
+                    user_id INTEGER,
+                    reason TEXT,
+                    created_at REAL NOT NULL,
+                    timed_out_until REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_audit_events_target
+                    ON audit_events (guild_id, target_id, action, entry_id DESC);
+
+                CREATE TABLE IF NOT EXISTS audit_role_changes (
+                    entry_id INTEGER NOT NULL,
+                    guild_id INTEGER NOT NULL,
+                    target_id INTEGER NOT NULL,
+                    role_id INTEGER NOT NULL,
+                    added INTEGER NOT NULL,
+                    PRIMARY KEY (entry_id, role_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_audit_role_changes_target
+                    ON audit_role_changes (guild_id, target_id, role_id, added, entry_id DESC);
+
+                CREATE TABLE IF NOT EXISTS audit_cursors (
+                    guild_id INTEGER PRIMARY KEY,
+                    last_entry_id INTEGER NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guild_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    progress TEXT NOT NULL DEFAULT '{}',
+                    error TEXT,
+                    created_by INTEGER,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_state
+                    ON jobs (state);
+                CREATE INDEX IF NOT EXISTS idx_jobs_guild
+                    ON jobs (guild_id, id DESC);
+
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS guild_config (
+                    guild_id INTEGER NOT NULL,
+                    key TEXT NOT NULL,
+                    value,
+                    PRIMARY KEY (guild_id, key)
+                );
+            """)
+
+    # Scheduled unmutes
+    def save_expiry(self, entry):
+        """Insert or replace a pending unmute"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scheduled_unmutes "
+                "(guild_id, member_id, expires_at, duration, reason, matched_reason) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (entry['guild_id'], entry['member_id'], entry['expires_at'],
+                 entry['duration'], entry['reason'], entry['matched_reason'])
+            )
+
+    def update_expiry(self, guild_id, member_id, expires_at):
+        """Move the deadline of a pending unmute"""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE scheduled_unmutes SET expires_at = ? WHERE guild_id = ? AND member_id = ?",
+                (expires_at, guild_id, member_id)
+            )
+
+    def delete_expiries(self, keys):
+        """Delete pending unmutes by (guild_id, member_id) in one transaction"""
+        if not keys:
+            return
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "DELETE FROM scheduled_unmutes WHERE guild_id = ? AND member_id = ?",
+                    keys
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def delete_handled_expiries(self, entries):
+        """Delete handled unmutes, skipping any rescheduled meanwhile (possibly by another process)"""
+        if not entries:
+            return
+        with self._lock:
+            self.conn.executemany(
+                "DELETE FROM scheduled_unmutes WHERE guild_id = ? AND member_id = ? AND expires_at = ?",
+                [(entry['guild_id'], entry['member_id'], entry['expires_at']) for entry in entries]
+            )
+
+    def retry_expiry(self, entry, expires_at):
+        """Move a failed unmute to a retry deadline unless it was rescheduled meanwhile; returns True if moved"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE scheduled_unmutes SET expires_at = ? WHERE guild_id = ? AND member_id = ? AND expires_at = ?",
+                (expires_at, entry['guild_id'], entry['member_id'], entry['expires_at'])
+            )
+        return cursor.rowcount > 0
+
+    def load_expiries(self):
+        """Return every pending unmute"""
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM scheduled_unmutes").fetchall()
+        return [dict(row) for row in rows]
+
+    # Moderation ledger
+    def record_mute(self, guild_id, member_id, reason, matched_reason, duration, moderator_id, issued_at):
+        """Record a mute issued by the bot"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO mute_ledger "
+                "(guild_id, member_id, reason, matched_reason, duration, issued_at, moderator_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (guild_id, member_id, reason, matched_reason, duration, issued_at, moderator_id)
+            )
+
+    def get_active_mute(self, guild_id, member_id):
+        """Return the latest mute of a member that hasn't been lifted, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM mute_ledger WHERE guild_id = ? AND member_id = ? AND lifted_at IS NULL "
+                "ORDER BY issued_at DESC LIMIT 1",
+                (guild_id, member_id)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def close_mute(self, guild_id, member_id, lifted_at):
+        """Mark a member's open mutes as lifted"""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE mute_ledger SET lifted_at = ? WHERE guild_id = ? AND member_id = ? AND lifted_at IS NULL",
+                (lifted_at, guild_id, member_id)
+            )
+
+    # Audit log events
+    def save_audit_events(self, guild_id, events, cursor):
+        """Store audit events and advance the guild's cursor in one transaction"""
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                for event in events:
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO audit_events "
+                        "(entry_id, guild_id, action, target_id, user_id, reason, created_at, timed_out_until) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (event['entry_id'], guild_id, event['action'], event['target_id'], event['user_id'],
+                         event['reason'], event['created_at'], event['timed_out_until'])
+                    )
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO audit_role_changes "
+                        "(entry_id, guild_id, target_id, role_id, added) VALUES (?, ?, ?, ?, ?)",
+                        [(event['entry_id'], guild_id, event['target_id'], role_id, 1) for role_id in event['roles_added']] +
+                        [(event['entry_id'], guild_id, event['target_id'], role_id, 0) for role_id in event['roles_removed']]
+                    )
+                if cursor is not None:
+                    self.conn.execute(
+                        "INSERT INTO audit_cursors (guild_id, last_entry_id) VALUES (?, ?) "
+                        "ON CONFLICT(guild_id) DO UPDATE SET last_entry_id = MAX(last_entry_id, excluded.last_entry_id)",
+                        (guild_id, cursor)
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def get_audit_cursor(self, guild_id):
+        """Return the newest audit entry id ingested for a guild, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT last_entry_id FROM audit_cursors WHERE guild_id = ?", (guild_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def find_role_grant(self, guild_id, target_id, role_id):
+        """Return the latest audit event that gave a role to a member, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT e.* FROM audit_role_changes c JOIN audit_events e ON e.entry_id = c.entry_id "
+                "WHERE c.guild_id = ? AND c.target_id = ? AND c.role_id = ? AND c.added = 1 "
+                "ORDER BY c.entry_id DESC LIMIT 1",
+                (guild_id, target_id, role_id)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def find_latest_timeout(self, guild_id, target_id):
+        """Return the latest audit event that timed a member out, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM audit_events WHERE guild_id = ? AND target_id = ? AND action = 'member_update' "
+                "AND timed_out_until IS NOT NULL ORDER BY entry_id DESC LIMIT 1",
+                (guild_id, target_id)
+            ).fetchone()
+        return dict(row) if row else None
+
+    # Background jobs
+    def create_job(self, guild_id, kind, params, created_by, created_at):
+        """Insert a queued job and return its id"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (guild_id, kind, params, state, created_by, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (guild_id, kind, json.dumps(params), created_by, created_at, created_at)
+            )
+        return cursor.lastrowid
+
+    def update_job(self, job_id, updated_at, state=None, progress=None, error=None):
+        """Save a job's state, progress checkpoint and/or error"""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET state = COALESCE(?, state), progress = COALESCE(?, progress), "
+                "error = COALESCE(?, error), updated_at = ? WHERE id = ?",
+                (state, json.dumps(progress) if progress is not None else None, error, updated_at, job_id)
+            )
+
+    def get_job(self, job_id):
+        """Return a job by id, or None"""
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job_from_row(row) if row else None
+
+    def load_unfinished_jobs(self):
+        """Return every queued or running job, oldest first"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE state IN ('queued', 'running') ORDER BY id"
+            ).fetchall()
+        return [self._job_from_row(row) for row in rows]
+
+    def list_jobs(self, guild_id, limit=10):
+        """Return a guild's most recent jobs"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE guild_id = ? ORDER BY id DESC LIMIT ?", (guild_id, limit)
+            ).fetchall()
+        return [self._job_from_row(row) for row in rows]
+
+    @staticmethod
+    def _job_from_row(row):
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['progress'] = json.loads(job['progress'])
+        return job
+
+    # Cluster mode: leader leases and per-guild config shared between processes
+    def acquire_lease(self, name, holder, ttl, now):
+        """Take or renew a lease; returns True if holder has it until now + ttl"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+                "WHERE leases.holder = excluded.holder OR leases.expires_at < ?",
+                (name, holder, now + ttl, now)
+            )
+            row = self.conn.execute("SELECT holder FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == holder
+
+    def release_lease(self, name, holder):
+        """Give up a lease so another process can take it right away"""
+        with self._lock:
+            self.conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+
+    def set_guild_config(self, guild_id, key, value):
+        """Store a per-guild setting (None removes it)"""
+        with self._lock:
+            if value is None:
+                self.conn.execute("DELETE FROM guild_config WHERE guild_id = ? AND key = ?", (guild_id, key))
+            else:
+                self.conn.execute(
+                    "INSERT INTO guild_config (guild_id, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(guild_id, key) DO UPDATE SET value = excluded.value",
+                    (guild_id, key, value)
+                )
+
+    def get_guild_config(self, guild_id, key):
+        """Return a per-guild setting, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM guild_config WHERE guild_id = ? AND key = ?", (guild_id, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def checkpoint(self):
+        """Flush the WAL into the main database file"""
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.conn.close()
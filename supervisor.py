@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Gateway Supervisor for FSociety Discord Bot
+"""
+
+import asyncio
+import logging
+import random
+import time
+import discord
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Gateway close codes that no amount of reconnecting will fix
+# (authentication failed, invalid shard, sharding required, invalid API version, invalid / disallowed intents)
+FATAL_CLOSE_CODES = {4004, 4010, 4011, 4012, 4013, 4014}
+
+BACKOFF_BASE = 1.0  # first retry after about a second
+BACKOFF_MAX = 300.0
+STABLE_AFTER = 60  # a run that lasted this long starts the backoff over
+
+client_restarts = metrics.registry.counter(
+    'fsociety_gateway_client_restarts_total',
+    "Times the Discord client was rebuilt after a failure that discord.py did not recover from",
+    labels=('reason',))
+fatal_errors = metrics.registry.counter(
+    'fsociety_gateway_fatal_errors_total',
+    "Errors that stopped the supervisor (bad token, disallowed intents, ...)",
+    labels=('reason',))
+
+def is_fatal(error):
+    """Whether an error from bot.start() means retrying is pointless"""
+    if isinstance(error, (discord.LoginFailure, discord.PrivilegedIntentsRequired)):
+        return True
+    return isinstance(error, discord.ConnectionClosed) and error.code in FATAL_CLOSE_CODES
+
+class Backoff:
+    """Exponential backoff with jitter, so many instances don't reconnect in lockstep after an outage"""
+
+    def __init__(self, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+        self.base = base
+        self.maximum = maximum
+        self.attempts = 0
+
+    def delay(self):
+        ceiling = min(self.maximum, self.base * 2 ** self.attempts)
+        self.attempts = min(self.attempts + 1, 32)
+        return random.uniform(self.base, max(self.base, ceiling))
+
+    def reset(self):
+        self.attempts = 0
+
+async def supervise(bot, token, stopping=None, on_stop=None):
+    """Run the bot until `stopping` is set, rebuilding the client after retryable failures
+
+    Resumable gateway drops are handled inside bot.start() by discord.py itself;
+    this only sees what escapes it. `on_stop` (a coroutine function) runs once when
+    `stopping` is set, before the gateway is closed. Returns the fatal error that
+    stopped it, or None.
+    """
+    stopping = stopping or asyncio.Event()
+    backoff = Backoff()
+    stopped = False
+    while not stopping.is_set():
+        if bot.is_closed():
+            bot.clear()  # a closed client must be reset before it can start again
+        started = time.monotonic()
+        try:
+            logger.info("🔄 محاولة تشغيل البوت...")
+            async with bot:
+                bot_task = asyncio.create_task(bot.start(token))
+                stop_task = asyncio.create_task(stopping.wait())
+                await asyncio.wait({bot_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+                stop_task.cancel()
+                if not bot_task.done():
+                    logger.info("🛑 استلام إشارة الإيقاف...")
+                    stopped = True
+                    await run_on_stop(on_stop)
+                    await bot.close()
+                await bot_task
+        except Exception as e:
+            if stopping.is_set():
+                break
+            reason = type(e).__name__
+            if is_fatal(e):
+                fatal_errors.inc(reason=reason)
+                logger.error(f"❌ خطأ لا يمكن تجاوزه بإعادة المحاولة: {e}")
+                return e
+            logger.error(f"❌ خطأ في تشغيل البوت: {e}")
+        else:
+            # start() only returns once the client was closed on purpose
+            return None
+
+        client_restarts.inc(reason=reason)
+        if time.monotonic() - started >= STABLE_AFTER:
+            backoff.reset()
+        delay = backoff.delay()
+        logger.info(f"🔄 إعادة تشغيل البوت خلال {delay:.1f} ثانية...")
+        try:
+            await asyncio.wait_for(stopping.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+    if not stopped:
+        await run_on_stop(on_stop)  # stopped while waiting to retry
+    return None
+
+async def run_on_stop(on_stop):
+    if on_stop is None:
+        return
+    try:
+        await on_stop()
+    except Exception as e:
+        logger.error(f"❌ خطأ أثناء إيقاف البوت: {e}")
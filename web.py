@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Asyncio HTTP Server for FSociety Discord Bot
+"""
+
+import asyncio
+import logging
+import aiohttp
+from aiohttp import web
+import metrics
+
+logger = logging.getLogger(__name__)
+
+KEEP_ALIVE_ENDPOINTS = ['/', '/health', '/ping', '/keep-alive']
+
+def create_web_app(status_snapshot, health_monitor):
+    """aiohttp app with the same endpoints as the Flask app, served from the bot's loop"""
+    async def home(request):
+        return web.Response(text="FSociety Discord Bot is running! 🤖")
+
+    async def health(request):
+        ok, details = health_monitor.liveness()
+        return web.json_response(details, status=200 if ok else 503)
+
+    async def ready(request):
+        ok, details = health_monitor.readiness()
+        return web.json_response(details, status=200 if ok else 503)
+
+    async def ping(request):
+        return web.Response(text="pong")
+
+    async def status(request):
+        # Same loop as the bot: live state, no cross-thread reads
+        return web.json_response(status_snapshot())
+
+    async def prometheus_metrics(request):
+        return web.Response(text=metrics.registry.render(),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    async def keep_alive(request):
+        return web.Response(text="alive")
+
+    app = web.Application()
+    app.router.add_get('/', home)
+    app.router.add_get('/health', health)
+    app.router.add_get('/live', health)
+    app.router.add_get('/ready', ready)
+    app.router.add_get('/ping', ping)
+    app.router.add_get('/status', status)
+    app.router.add_get('/metrics', prometheus_metrics)
+    app.router.add_get('/keep-alive', keep_alive)
+    return app
+
+async def start_web_server(port, status_snapshot, health_monitor):
+    """Start the HTTP server on the running loop; returns the runner (call cleanup() to stop)"""
+    runner = web.AppRunner(create_web_app(status_snapshot, health_monitor), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '0.0.0.0', port).start()
+    logger.info(f"🌐 بدء خادم HTTP على port {port}")
+    return runner
+
+async def keep_alive_loop(service_url, interval=25):
+    """Ping the service's own endpoints so the platform doesn't idle it"""
+    logger.info(f"🚀 بدء Keep-Alive Service لـ: {service_url}")
+    await asyncio.sleep(10)
+
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        while True:
+            for endpoint in KEEP_ALIVE_ENDPOINTS:
+                try:
+                    async with session.get(f"{service_url}{endpoint}") as response:
+                        if response.status == 200:
+                            logger.info(f"✅ Keep-alive ping successful: {endpoint}")
+                        else:
+                            logger.warning(f"⚠️ Keep-alive ping failed: {endpoint} - {response.status}")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.error(f"❌ Keep-alive ping error for {endpoint}: {e}")
+            await asyncio.sleep(interval)